@@ -82,6 +82,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # take the write lock when a transaction starts so concurrent uploads wait
+            # (up to timeout seconds) instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            # readers don't block the writer
+            'init_command': 'PRAGMA journal_mode=WAL;',
+        },
     }
 }
 
@@ -0,0 +1,173 @@
+"""
+Bulk transcript import for registrar PDF dumps.
+
+    python manage.py import_transcripts <pdf directory> [--workers N] [--report report.json]
+
+PDFs are parsed with `extract_info` in a process pool. The parsed transcripts are saved
+(JSON file + DB rows, same as an upload) by the main process, since sqlite has a single
+writer. A PDF belongs to the user whose username or id is its file name, otherwise to the
+only user with the name on the transcript.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from website.models import User
+from website.views import save_transcript
+from core.helpers import extract_info
+
+
+def parse_pdf(path):
+    """
+    Parse one transcript PDF, runs in a worker process.
+
+    Returns:
+        tuple: (path, student_info or None, error message or None, parse seconds)
+    """
+    start = time.perf_counter()
+    try:
+        return path, extract_info(path), None, time.perf_counter() - start
+    except AssertionError as e:
+        return path, None, f"Invalid transcript format: {e}", time.perf_counter() - start
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Parse a directory of transcript PDFs in parallel and save them to their users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="directory with the transcript PDFs (searched recursively)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="parser processes (default: number of CPUs)")
+        parser.add_argument("--batch-size", type=int, default=200,
+                            help="transcripts saved per database transaction (default: 200)")
+        parser.add_argument("--report", help="write the throughput/failure report to this JSON file")
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"])
+        if not directory.is_dir():
+            raise CommandError(f"{directory} is not a directory")
+
+        paths = sorted(str(p) for p in directory.rglob("*") if p.suffix.lower() == ".pdf")
+        if not paths:
+            raise CommandError(f"no PDF files in {directory}")
+
+        transcript_dir = settings.BASE_DIR / "transcripts"
+        transcript_dir.mkdir(parents=True, exist_ok=True)
+        self.load_users()
+
+        # the progress bar is only needed here, keep it out of Django startup
+        from tqdm import tqdm
+
+        start = time.perf_counter()
+        imported, failures = [], []
+        parse_seconds = 0.0
+        pending = []
+
+        with ProcessPoolExecutor(max_workers=max(options["workers"], 1)) as pool:
+            futures = [pool.submit(parse_pdf, path) for path in paths]
+            for future in tqdm(as_completed(futures), total=len(futures), unit="pdf"):
+                path, student_info, error, seconds = future.result()
+                parse_seconds += seconds
+                if error:
+                    failures.append({"file": path, "error": error})
+                    continue
+                pending.append((path, student_info))
+                if len(pending) >= options["batch_size"]:
+                    self.save_batch(pending, transcript_dir, imported, failures)
+                    pending = []
+
+        self.save_batch(pending, transcript_dir, imported, failures)
+        elapsed = time.perf_counter() - start
+
+        report = {
+            "directory": str(directory),
+            "files": len(paths),
+            "imported": len(imported),
+            "failed": len(failures),
+            "workers": options["workers"],
+            "seconds": round(elapsed, 3),
+            "pdfs_per_second": round(len(paths) / elapsed, 2) if elapsed else None,
+            "mean_parse_seconds": round(parse_seconds / len(paths), 4),
+            "failures": sorted(failures, key=lambda f: f["file"]),
+        }
+
+        if options["report"]:
+            with open(options["report"], "w") as f:
+                json.dump(report, f, indent=4)
+
+        self.stdout.write(f"{report['imported']}/{report['files']} transcripts imported in {report['seconds']} s "
+                          f"({report['pdfs_per_second']} PDFs/s, {report['workers']} workers)")
+        for failure in report["failures"]:
+            self.stdout.write(self.style.ERROR(f"  {failure['file']}: {failure['error']}"))
+
+    def load_users(self):
+        # lookups for every PDF, loaded once instead of a query per file
+        self.users_by_username = {}
+        self.users_by_id = {}
+        self.users_by_name = {}
+        for user in User.objects.all():
+            self.users_by_username[user.username.lower()] = user
+            self.users_by_id[str(user.id)] = user
+            name = f"{user.first_name} {user.last_name}".lower().strip()
+            self.users_by_name.setdefault(name, []).append(user)
+
+    def find_user(self, path, student_info):
+        """
+        Returns:
+            tuple: (user or None, error message or None)
+        """
+        parsed_name = (student_info.get("name") or "").lower().strip()
+        stem = Path(path).stem.lower()
+        by_username = self.users_by_username.get(stem)
+        by_id = self.users_by_id.get(stem)
+        # a username that is another user's id does not tell which one the PDF belongs to
+        if by_username and by_id and by_username != by_id:
+            return None, f'File name "{stem}" is the username of one user and the id of another'
+        user = by_username or by_id
+
+        if user is None:
+            matches = self.users_by_name.get(parsed_name, [])
+            if len(matches) != 1:
+                return None, f'{"No" if not matches else "More than one"} user named "{student_info.get("name")}"'
+            return matches[0], None
+
+        # same check as an upload from the dashboard
+        user_full_name = f"{user.first_name} {user.last_name}"
+        if parsed_name != user_full_name.lower().strip():
+            return None, f'Name mismatch: Transcript shows "{student_info.get("name")}" but account shows "{user_full_name}"'
+        return user, None
+
+    def save_batch(self, batch, transcript_dir, imported, failures):
+        # one commit per batch, each transcript in its own savepoint so a bad one is skipped alone
+        saved = []
+        try:
+            with transaction.atomic():
+                for path, student_info in batch:
+                    user, error = self.find_user(path, student_info)
+                    if error:
+                        failures.append({"file": path, "error": error})
+                        continue
+                    try:
+                        save_transcript(user, student_info)
+                    except Exception as e:
+                        failures.append({"file": path, "error": f"{type(e).__name__}: {e}"})
+                        continue
+                    saved.append((path, user, student_info))
+        except Exception as e:
+            # the whole batch was rolled back, nothing of it is on disk yet
+            failures.extend({"file": path, "error": f"Batch not saved: {type(e).__name__}: {e}"}
+                            for path, _, _ in saved)
+            return
+
+        # JSON files only for rows that were committed
+        for path, user, student_info in saved:
+            with open(transcript_dir / f"{user.id}.json", "w") as f:
+                json.dump(student_info, f, indent=4)
+            imported.append(path)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcript',
+            name='data',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transcript',
+            name='data_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -24,6 +24,11 @@ class Transcript(models.Model):
     gpa = models.DecimalField(max_digits=4, decimal_places=3)
     total_credits = models.IntegerField()
 
+    # parsed transcript (output of extract_info) and its transcript_hash, the chat sends
+    # the agent server only the hash and the full transcript when the agent doesn't have it
+    data = models.JSONField(null=True, blank=True)
+    data_hash = models.CharField(max_length=64, blank=True, default='')
+
     def __str__(self):
         return str(self.transcript_id)
 
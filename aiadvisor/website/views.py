@@ -9,14 +9,13 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import UserRegistrationForm, TranscriptUploadForm, UpdateUserForm
 from django.conf import settings
+from django.db import transaction
 from .models import User, Transcript, StudentCourse
-from core.helpers import extract_info
+from core.helpers import extract_info, transcript_hash
 from core.llm import ChatHistoryManager
-import tempfile
 import requests
 import json
 import html
-import os
 import io
 import re
 from reportlab.lib.pagesizes import letter
@@ -128,6 +127,93 @@ def dashboard(request):
 
     return render(request, 'website/dashboard.html', context)
 
+def student_courses(transcript, student_info):
+    """
+    Build (unsaved) StudentCourse rows for every transfer, in-progress and completed
+    course of a parsed transcript, in that order.
+    """
+    courses = []
+
+    # Handle TRANSFER courses 
+    for course in student_info.get('transfer', []):
+        courses.append(StudentCourse(
+            transcript=transcript,
+            title=course['title'],
+            letter_grade=course['grade'],
+            passed=True,
+            credit_hours=float(course['credits']),
+            level='Transfer',
+            term='Transfer Credit',
+            description=''
+        ))
+
+    # Handle in-progress courses
+    for term_data in student_info.get('inprogress', []):
+        term = term_data['term']
+        for course in term_data['courses']:
+            courses.append(StudentCourse(
+                transcript=transcript,
+                title=course['title'],
+                letter_grade='IP',  # In Progress
+                passed=False,  # Not completed yet
+                credit_hours=float(course['credits']),
+                level=course['level'],
+                term=term,
+                description='In Progress'
+            ))
+
+    # Handle completed courses
+    for term_data in student_info.get('completed', []):
+        term = term_data['term']
+        for course in term_data['courses']:
+            grade = course['grade']
+            courses.append(StudentCourse(
+                # TODO: Talk to AI team about if we need the ID of the course to be the CRN for context
+                transcript=transcript,
+                title=course['title'],
+                letter_grade=grade,
+                passed=grade not in ['F', 'W'],
+                credit_hours=float(course['credits']),
+                level=course['level'],
+                term=term,
+                # TODO: Access descriptions somewhere
+                description=''
+            ))
+
+    return courses
+
+def save_transcript(user, student_info):
+    """
+    Replace the user's transcript with a parsed one (output of extract_info).
+    The old transcript is deleted and the new one written with its courses in a single
+    transaction, so a failed upload leaves the previous transcript in place.
+    """
+    # Get total credits and quality points from student_info
+    total_credits = student_info['earned_credits']
+    gpa = student_info['gpa']
+
+    with transaction.atomic():
+        # Delete old transcript if exists
+        Transcript.objects.filter(user=user).delete()
+
+        # Now we can create the Transcript object for this user
+        transcript = Transcript.objects.create(
+            user=user,
+            major=student_info.get('major', ''),
+            # the parser reports a missing concentration as None, the column is NOT NULL
+            minor=student_info.get('minor') or '',
+            concentration=student_info.get('concentration') or '',
+            gpa=round(gpa, 3),
+            total_credits=int(total_credits),
+            data=student_info,
+            data_hash=transcript_hash(student_info)
+        )
+
+        # one INSERT for all courses instead of one per course
+        StudentCourse.objects.bulk_create(student_courses(transcript, student_info))
+
+    return transcript
+
 @login_required(login_url='login')
 def upload_transcript(request):
     if request.method == 'POST' and request.FILES.get('transcript_pdf'):
@@ -140,13 +226,7 @@ def upload_transcript(request):
         
         # TODO: Maybe check for filetypes?
 
-        # Save PDF to a temporary location for parsing
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            for chunk in pdf_file.chunks():
-                tmp_file.write(chunk)
-            tmp_path = tmp_file.name
-
-        # Now lets run our parser on the transcript
+        # Now lets run our parser on the transcript, straight from the upload (no temp file)
         try:
             
             # Decide where to save the parsed transcript JSON for this user
@@ -156,7 +236,7 @@ def upload_transcript(request):
             transcript_json_path = transcript_dir / f"{request.user.id}.json"
 
             # Parse + save JSON (same schema as sample1.json)
-            student_info = extract_info(tmp_path, save=str(transcript_json_path))
+            student_info = extract_info(pdf_file, save=str(transcript_json_path))
 
             # Confirm the name matches the user
             parsed_name = student_info.get('name', '')
@@ -165,84 +245,8 @@ def upload_transcript(request):
                 messages.error(request, f'Name mismatch: Transcript shows "{parsed_name}" but account shows "{user_full_name}"')
                 return redirect('dashboard')
             
-            # Delete old transcript if exists
-            if hasattr(request.user, 'transcript'):
-                request.user.transcript.delete()
-
-            # Get total credits and quality points from student_info
-            total_credits = student_info['earned_credits']
-            total_quality_points = student_info['quality_points']
-            
-            print(f"DEBUG - Total Credits: {total_credits}")
-            print(f"DEBUG - Total Quality Points: {total_quality_points}")
-
-            # Get GPA from student_info
-            gpa = student_info['gpa']
-
-            print(f"DEBUG - Calculated GPA: {gpa}")
-
-            # Now we can create the Transcript object for this user
-            transcript = Transcript.objects.create(
-                user=request.user,
-                major=student_info.get('major', ''),
-                minor=student_info.get('minor', ''),
-                concentration=student_info.get('concentration', ''),
-                gpa=round(gpa, 3),
-                total_credits=int(total_credits)
-            )
+            save_transcript(request.user, student_info)
 
-            # Handle TRANSFER courses 
-            if 'transfer' in student_info:
-                for course in student_info['transfer']:
-                    StudentCourse.objects.create(
-                        transcript=transcript,
-                        title=course['title'],
-                        letter_grade=course['grade'],
-                        passed=True,
-                        credit_hours=float(course['credits']),
-                        level='Transfer',
-                        term='Transfer Credit',
-                        description=''
-                    )
-
-            # Handle in-progress courses
-            if 'inprogress' in student_info:
-                for term_data in student_info['inprogress']:
-                    term = term_data['term']
-                    for course in term_data['courses']:
-                        StudentCourse.objects.create(
-                            transcript=transcript,
-                            title=course['title'],
-                            letter_grade='IP',  # In Progress
-                            passed=False,  # Not completed yet
-                            credit_hours=float(course['credits']),
-                            level=course['level'],
-                            term=term,
-                            description='In Progress'
-                        )
-
-            # Handle completed courses
-            if 'completed' in student_info:
-                for term_data in student_info['completed']:
-                    term = term_data['term']
-                    for course in term_data['courses']:
-                        grade = course['grade']
-                        passed = grade not in ['F', 'W']
-
-                        StudentCourse.objects.create(
-                            # TODO: Talk to AI team about if we need the ID of the course to be the CRN for context
-                            transcript=transcript,
-                            title=course['title'],
-                            letter_grade=grade,
-                            passed=passed,
-                            credit_hours=float(course['credits']),
-                            level=course['level'],
-                            term=term,
-                            # TODO: Access descriptions somewhere
-                            description=''
-                        )
-
-            
             messages.success(request, 'Transcript uploaded succesfully.')
             return redirect('dashboard')
         
@@ -253,11 +257,6 @@ def upload_transcript(request):
         except Exception as e:
             messages.error(request, f'Error processing transcript: {str(e)}')
 
-        finally:
-            # Clean up our temp file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
     return redirect('dashboard')
 
 @login_required(login_url='login')
@@ -305,6 +304,44 @@ def chat_page(request):
 
     return render(request, 'website/chat.html', {'chat': chat, 'messages': messages})
 
+def chat_transcript(user):
+    """
+    The user's parsed transcript with only its hash loaded, None if none was uploaded.
+    Transcripts uploaded before the data was kept in the database are read from their
+    JSON file once and stored.
+    """
+    transcript = Transcript.objects.defer('data').filter(user=user).first()
+    if transcript is None or transcript.data_hash:
+        return transcript
+
+    transcript_json_path = settings.BASE_DIR / "transcripts" / f"{user.id}.json"
+    if not transcript_json_path.exists():
+        return None
+    with open(transcript_json_path, "r") as f:
+        transcript.data = json.load(f)
+    transcript.data_hash = transcript_hash(transcript.data)
+    transcript.save(update_fields=['data', 'data_hash'])
+    return transcript
+
+def post_chat(user, message_history):
+    """
+    Start a chat request on the agent server. The transcript is sent by hash, the agent
+    resolves it from its cache and answers 404 when it doesn't have it, then the request
+    is sent again with the full transcript.
+    """
+    transcript = chat_transcript(user)
+    payload = {"messages": message_history}
+    if transcript is not None:
+        payload["transcript_hash"] = transcript.data_hash
+
+    response = requests.post(settings.AGENT_SERVER + "/chat", json=payload, stream=True)
+    if response.status_code == 404 and transcript is not None:
+        response.close()
+        payload["transcript"] = transcript.data
+        response = requests.post(settings.AGENT_SERVER + "/chat", json=payload, stream=True)
+
+    return response
+
 @csrf_exempt
 @login_required(login_url='login')
 def send_message(request):
@@ -337,25 +374,16 @@ def send_message(request):
             limit=20
         )
 
-        # Get the transcript for this user
-        transcript_dir = settings.BASE_DIR / "transcripts"
-        transcript_dir.mkdir(parents=True, exist_ok=True)
-
-        transcript_json_path = transcript_dir / f"{request.user.id}.json"
-        transcript = json.loads(open(transcript_json_path, "r").read())
-
         def generate_response():
-            response = requests.post(
-                settings.AGENT_SERVER + "/chat",
-                json={"messages": message_history, "transcript": transcript},
-                stream=True
-            )
+            response = post_chat(request.user, message_history)
+
+            # decode incrementally, a token can end in the middle of a multi-byte character
+            response.encoding = "utf-8"
 
             ai_response_text = ""
-            for chunk in response.iter_content(chunk_size=None):
-                if not chunk:
+            for text in response.iter_content(chunk_size=None, decode_unicode=True):
+                if not text:
                     continue
-                text = chunk.decode("utf-8")
                 ai_response_text += text
                 yield text
 
@@ -367,7 +395,11 @@ def send_message(request):
                 timestamp=timezone.now()
             )
 
-        return StreamingHttpResponse(generate_response(), content_type="text/plain")
+        streaming_response = StreamingHttpResponse(generate_response(), content_type="text/plain; charset=utf-8")
+        # forward tokens as they arrive instead of letting a proxy collect the whole answer
+        streaming_response["Cache-Control"] = "no-cache"
+        streaming_response["X-Accel-Buffering"] = "no"
+        return streaming_response
 
 
     return JsonResponse({"error": "Invalid request"}, status=400)
@@ -1,4 +1,37 @@
-from .courses import *
-from .programs import *
-from .embedding import *
-from .llm import *
+"""
+Submodules are imported on first use, so `import core.tools` or `import core.llm` does
+not load the scraping (bs4) and embedding (sentence-transformers, chromadb) stacks.
+`from core import LLMAgent` still works, the name is resolved by __getattr__ below.
+"""
+
+import importlib
+
+# name -> submodule defining it, the names this package re-exported with star imports
+_LAZY_EXPORTS = {
+    "BASE_URL": "courses",
+    "scrape_courses": "courses",
+    "scrape_programs": "programs",
+    "course_transformer_into_json": "programs",
+    "transform_course_sections_in_json": "programs",
+    "EmbeddingGemma300m": "embedding",
+    "ChatHistoryManager": "llm",
+    "LLMAgent": "llm",
+    "INSTRUCTION_PROMPT": "llm",
+    "COURSE_RECOMMEND_SCHEMA": "llm",
+    "RECOMMEND_SCHEMA": "llm",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
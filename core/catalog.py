@@ -0,0 +1,326 @@
+"""
+Course Catalog
+
+In-memory index over core/vault/courses.json. The catalog is loaded once per process
+through `get_catalog()` and shared by AdvisorTools and PreqTester, so tool calls never
+re-read the JSON file.
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter
+from functools import lru_cache, cached_property
+from typing import Dict, Any, List, Optional, Set, Iterator, Tuple
+from rapidfuzz import fuzz, process
+from core.helpers import normalize_course_code, normalize_course_title_for_search
+
+DEFAULT_COURSES_PATH = os.path.join(os.path.dirname(__file__), "vault", "courses.json")
+
+# words that carry no meaning in a course search ("courses about machine learning")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "with", "about", "course", "courses",
+    "class", "classes", "credits", "what", "which", "any", "some", "i", "me", "my",
+}
+
+
+# short forms students type, mapped to the word used in the catalog
+ALIASES = {
+    "intro": "introduction",
+    "calc": "calculus",
+    "stats": "statistics",
+    "psych": "psychology",
+    "chem": "chemistry",
+    "bio": "biology",
+    "econ": "economics",
+}
+
+# catalog boilerplate at the end of every description, it would match every query about a department
+DESCRIPTION_BOILERPLATE = re.compile(r"(?:Prerequisite Courses|Course Attributes|Academic Department):.*$", re.DOTALL)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text without stop words, short forms expanded."""
+    return [ALIASES.get(w, w) for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOP_WORDS]
+
+
+class KeywordIndex:
+    """
+    Inverted index over course titles and descriptions with BM25 ranking.
+    Titles are counted twice so a title hit outranks a passing mention in a description.
+
+    Attributes
+    ----------
+    postings : dict
+        token -> list of (document id, term frequency)
+    doc_lengths : list[int]
+        number of tokens in each document
+    """
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, documents: List[str]):
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+
+        for doc_id, text in enumerate(documents):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                self.postings.setdefault(token, []).append((doc_id, count))
+
+        self.avg_length = sum(self.doc_lengths) / max(len(self.doc_lengths), 1)
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """BM25 score of every document that contains at least one query token."""
+        n_docs = len(self.doc_lengths)
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings:
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+        return scores
+
+
+class CourseCatalog:
+    """
+    Course records from courses.json with lookup indexes.
+
+    Attributes
+    ----------
+    courses : list[dict]
+        course records in file order (CourseCode, CourseTitle, Credits, Description, Prerequisites)
+    by_code : dict
+        normalized course code ("CS04222") -> course record
+    by_subject : dict
+        subject code ("CS") -> course records in file order
+    by_credits : dict
+        raw Credits value ("3", "1 to 3") -> course records in file order
+    titles : dict
+        course code -> title normalized with `normalize_course_title_for_search`
+    title_index : dict
+        title token ("calculus", "3") -> set of course codes with that token in their title
+    keyword_index : KeywordIndex
+        BM25 index over titles and descriptions, built on the first `search`
+    title_choices : tuple
+        (course codes, normalized titles, title tokens) in file order for rapidfuzz,
+        built on the first `fuzzy_title_match`
+    """
+    def __init__(self, courses_path: str = DEFAULT_COURSES_PATH):
+        self.courses_path = courses_path
+
+        with open(courses_path, 'r', encoding='utf-8') as f:
+            self.courses: List[Dict[str, Any]] = json.load(f)
+
+        self.by_code: Dict[str, Dict[str, Any]] = {}
+        self.by_subject: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_credits: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        self.titles: Dict[str, str] = {}
+        self.title_index: Dict[str, Set[str]] = {}
+        self._position: Dict[str, int] = {}
+
+        for i, course in enumerate(self.courses):
+            code = course.get('CourseCode', '')
+            # courses.json has a few duplicated codes, the first record wins like a linear scan
+            if normalize_course_code(code) in self.by_code:
+                continue
+            self.by_code[normalize_course_code(code)] = course
+            self._position[code] = i
+
+            self.by_subject.setdefault(self.subject_of(code), []).append(course)
+            self.by_credits.setdefault(course.get('Credits'), []).append(course)
+
+            title = normalize_course_title_for_search(course.get('CourseTitle') or '')
+            self.titles[code] = title
+            for token in set(title.split()):
+                self.title_index.setdefault(token, set()).add(code)
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def __iter__(self):
+        return iter(self.courses)
+
+    def __contains__(self, code: str) -> bool:
+        return normalize_course_code(code) in self.by_code
+
+    @staticmethod
+    def subject_of(code: str) -> str:
+        # "MATH 01230" -> "MATH"
+        return (code.split()[0] if ' ' in code else code[:2]).upper()
+
+    def get(self, code: str) -> Optional[Dict[str, Any]]:
+        """Course record for a code in any spacing/case ("cs 04222", "CS04222"), None if not found."""
+        return self.by_code.get(normalize_course_code(code))
+
+    def subject(self, subject: str) -> List[Dict[str, Any]]:
+        """Course records of a subject code, in file order."""
+        return self.by_subject.get(subject.upper(), [])
+
+    def with_credits(self, credits: str) -> List[Dict[str, Any]]:
+        """Course records whose Credits value is exactly `credits`, in file order."""
+        return self.by_credits.get(credits, [])
+
+    @cached_property
+    def keyword_index(self) -> KeywordIndex:
+        # built on the first keyword search, document ids are positions in `courses`
+        return KeywordIndex([
+            f"{c.get('CourseTitle') or ''} {c.get('CourseTitle') or ''} "
+            + DESCRIPTION_BOILERPLATE.sub("", c.get('Description') or '')
+            for c in self.courses
+        ])
+
+    def search(self, query: str, subject: Optional[str] = None,
+               credits: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], float]]:
+        """
+        Ranked keyword search over titles and descriptions.
+
+        Args:
+            query: free text ("machine learning", "intro to databases")
+            subject: only courses of this subject code
+            credits: only courses with exactly this Credits value
+
+        Yields:
+            (course record, BM25 score), best match first. Pulled lazily from a heap,
+            so stopping after the top k results only pays for k pops.
+        """
+        heap = []
+        for doc_id, score in self.keyword_index.scores(query).items():
+            course = self.courses[doc_id]
+            code = course.get('CourseCode', '')
+            if self._position.get(code) != doc_id:
+                continue # duplicated course code
+            if subject and self.subject_of(code) != subject.upper():
+                continue
+            if credits and course.get('Credits') != credits:
+                continue
+            heap.append((-score, doc_id))
+
+        heapq.heapify(heap)
+        while heap:
+            score, doc_id = heapq.heappop(heap)
+            yield self.courses[doc_id], -score
+
+    def title_candidates(self, words: List[str]) -> List[Dict[str, Any]]:
+        """
+        Course records whose normalized title contains every word as a substring
+        (same as `word in title` for each word), in file order.
+
+        Args:
+            words: words of a title normalized with `normalize_course_title_for_search`
+        """
+        if not words:
+            return list(self.courses)
+
+        codes = None
+        for word in words:
+            matched = self._codes_containing(word)
+            codes = matched if codes is None else codes & matched
+            if not codes:
+                return []
+
+        return [self.courses[self._position[code]] for code in sorted(codes, key=self._position.get)]
+
+    @cached_property
+    def title_choices(self) -> Tuple[List[str], List[str], List[str]]:
+        codes = sorted(self.titles, key=self._position.get)
+        return codes, [self.titles[code] for code in codes], list(self.title_index)
+
+    def fuzzy_title_match(self, title: str, min_similarity: float,
+                          subject: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Spelling-tolerant title lookup ("calculas 3" -> "calculus iii").
+
+        The similarity of a course is the better of the full title ratio and the average,
+        over the search words, of each word's best ratio against the title words.
+        Ratios are rapidfuzz `fuzz.ratio` scaled to 0-1.
+
+        Args:
+            title: title as typed by the student, normalized here with `normalize_course_title_for_search`
+            min_similarity: courses below this similarity are ignored
+            subject: only courses whose code starts with this prefix ("MATH")
+
+        Returns:
+            (course record, similarity) of the best match, first in file order on ties, None if no match
+        """
+        search = normalize_course_title_for_search(title)
+        words = search.split()
+        if not search:
+            return None
+
+        codes, titles, tokens = self.title_choices
+        cutoff = min_similarity * 100
+        similarity: Dict[str, float] = {}
+
+        # full title ratio, rapidfuzz skips titles that cannot reach the cutoff
+        for _, score, i in process.extract(search, titles, scorer=fuzz.ratio, score_cutoff=cutoff, limit=None):
+            similarity[codes[i]] = score / 100
+
+        # word level: only tokens scoring at least `floor` against a word are returned by rapidfuzz.
+        # a title with no such token for a word gets less than `floor` from it, which bounds
+        # its average from above; titles whose bound is below the cutoff are never scored
+        floor = min_similarity - 0.2
+        word_scores = [
+            {tokens[i]: score / 100
+             for _, score, i in process.extract(word, tokens, scorer=fuzz.ratio, score_cutoff=floor * 100, limit=None)}
+            for word in words
+        ]
+
+        bounds: Dict[str, float] = {}
+        for scores in word_scores:
+            best: Dict[str, float] = {}
+            for token, score in scores.items():
+                for code in self.title_index[token]:
+                    if score > best.get(code, 0.0):
+                        best[code] = score
+            for code, score in best.items():
+                bounds[code] = bounds.get(code, 0.0) + score - floor
+
+        needed = (min_similarity - floor) * len(words)
+        for code, bound in bounds.items():
+            if bound < needed:
+                continue
+            title_tokens = set(self.titles[code].split())
+            word_match = sum(
+                max(scores[t] if t in scores else fuzz.ratio(word, t) / 100 for t in title_tokens)
+                for word, scores in zip(words, word_scores)
+            ) / len(words)
+            if word_match > similarity.get(code, 0.0):
+                similarity[code] = word_match
+
+        best = None
+        for code, score in similarity.items():
+            if score < min_similarity or (subject and not code.startswith(subject)):
+                continue
+            if best is None or (score, -self._position[code]) > (best[1], -self._position[best[0]]):
+                best = (code, score)
+
+        if best is None:
+            return None
+        return self.courses[self._position[best[0]]], best[1]
+
+    @lru_cache(maxsize=1024)
+    def _codes_containing(self, word: str) -> frozenset:
+        # words never contain spaces, so a word is in a title only if it is inside one of its tokens
+        codes = set()
+        for token, token_codes in self.title_index.items():
+            if word in token:
+                codes |= token_codes
+        return frozenset(codes)
+
+
+@lru_cache(maxsize=None)
+def _load_catalog(courses_path: str) -> CourseCatalog:
+    return CourseCatalog(courses_path)
+
+
+def get_catalog(courses_path: str = DEFAULT_COURSES_PATH) -> CourseCatalog:
+    """Process-wide catalog for a courses.json, loaded on the first call."""
+    return _load_catalog(os.path.abspath(courses_path))
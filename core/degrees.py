@@ -0,0 +1,200 @@
+"""
+Degree Requirements
+
+Parsed model of the degree files in core/vault/degrees. A degree file is read and parsed
+once through `load_degree()` (bounded LRU, reloaded when the file changes) and shared by
+transcript2context and the degree tools instead of re-reading the raw JSON every turn.
+"""
+
+import os
+import re
+import json
+from functools import lru_cache, cached_property
+from typing import Dict, Any, List, Optional, Tuple
+from core.helpers import course_transformer_into_json, extract_total_credits, format_course_for_output
+
+# number of parsed degree files kept in memory
+DEGREE_CACHE_SIZE = 64
+
+# "11 s.h." or "32-33 s.h." in a section heading
+SECTION_CREDITS = re.compile(r'(\d{1,3})\s?-?\s?((\d{1,3}))?\s+s.h.')
+
+# sections that are the same for every student or not course lists, left out of the requirements text
+SKIPPED_SECTIONS = ["rowan core", "rowan experience", "free elective", "total required"]
+
+COURSE_PATTERN = re.compile(r"[A-Z]{2,5}\s+\d{3,5}")
+
+
+class DegreeSection:
+    """
+    One heading of a degree file.
+
+    Attributes
+    ----------
+    heading : str
+        section heading as written in the degree file
+    credits : tuple[float, float] or None
+        credit range from the heading, "11 s.h." -> (11, 11), "32-33 s.h." -> (32, 33)
+    groups : list[tuple[str, list[dict]]]
+        ("and" | "or", course dicts) requirement groups of a section with requirements
+    courses : list[dict]
+        courses listed as text in a list section, parsed with `course_transformer_into_json`
+    has_requirements : bool
+        the section has a requirements list (even an empty one)
+    restricted : bool
+        the heading names electives
+    skipped : bool
+        the heading is one of SKIPPED_SECTIONS
+    """
+    def __init__(self, heading: str, value: Any):
+        self.heading = heading
+
+        match = SECTION_CREDITS.search(heading)
+        if match:
+            low = float(match.group(1))
+            self.credits: Optional[Tuple[float, float]] = (low, float(match.group(2)) if match.group(2) else low)
+        else:
+            self.credits = None
+
+        lowered = heading.lower()
+        self.skipped = any(skip in lowered for skip in SKIPPED_SECTIONS)
+        self.restricted = "elective" in lowered
+
+        self.has_requirements = isinstance(value, dict) and "requirements" in value
+        self.groups: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self.courses: List[Dict[str, Any]] = []
+
+        if self.has_requirements:
+            for group in value.get("requirements", []):
+                if isinstance(group, dict) and "courses" in group:
+                    self.groups.append((group.get("type", "and").lower(), group.get("courses", [])))
+        elif isinstance(value, list):
+            for item in value:
+                if not isinstance(item, str) or item in ("AND", "OR"):
+                    continue
+                if COURSE_PATTERN.search(item):
+                    parsed = course_transformer_into_json(item)
+                    if parsed.get("subject") and parsed.get("course_number"):
+                        self.courses.append(parsed)
+
+
+class DegreeRequirements:
+    """
+    Degree file parsed into sections.
+
+    Attributes
+    ----------
+    name : str
+        degree name ("Bachelor of Science in Computer Science")
+    content : dict
+        raw content of the degree file, heading -> section
+    sections : list[DegreeSection]
+        one per heading, in file order
+    total_credits : int or None
+        credits required for the degree
+    description : str or None
+        first paragraph of the section named after the degree
+    text : str
+        requirements formatted for the LLM, built on first access
+    """
+    def __init__(self, data: Dict[str, Any]):
+        self.name = data.get("name", "Unknown Degree")
+        self.url = data.get("url")
+        self.content: Dict[str, Any] = data.get("content", {})
+        self.sections = [DegreeSection(heading, value) for heading, value in self.content.items()]
+        self.total_credits = extract_total_credits(self.content)
+
+        self.description = None
+        for heading, value in self.content.items():
+            if isinstance(value, list) and value and self.name.lower() in heading.lower():
+                self.description = value[0]
+                break
+
+    @classmethod
+    def from_file(cls, path: str) -> "DegreeRequirements":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @cached_property
+    def text(self) -> str:
+        output = []
+
+        # Output total credits at the top due to its importance
+        if self.total_credits:
+            output.append(f"Total Credits: {self.total_credits}")
+            output.append("")
+
+        if self.description:
+            output.append(f"Description: {self.description}")
+            output.append("")
+
+        # TODO: manually add the rowan core, because it is the same for all rowan students
+
+        required_courses = []
+        choice_groups = []
+        restricted_electives = []
+        restricted_credit_req = None
+
+        for section in self.sections:
+            if section.skipped:
+                continue
+
+            # Extract credit requirement for restricted electives
+            if section.restricted and not restricted_credit_req:
+                match = re.search(r'(\d+)\s*s\.h\.', section.heading)
+                if match:
+                    restricted_credit_req = match.group(1)
+
+            for group_type, courses in section.groups:
+                if group_type == "or":
+                    # Filter out non-course entries
+                    valid_courses = [c for c in courses if c.get("subject") and c.get("course_number")]
+                    if valid_courses:
+                        choice_groups.append(valid_courses)
+                elif group_type == "and":
+                    (restricted_electives if section.restricted else required_courses).extend(courses)
+
+            (restricted_electives if section.restricted else required_courses).extend(section.courses)
+
+        if required_courses:
+            output.append("Required Courses:")
+            for course in required_courses:
+                formatted = format_course_for_output(course)
+                if formatted:
+                    output.append(f"- {formatted}")
+            output.append("")
+
+        for group in choice_groups:
+            if len(group) > 1:
+                output.append("Choose One:")
+                for course in group:
+                    formatted = format_course_for_output(course)
+                    if formatted:
+                        output.append(f"- {formatted}")
+                output.append("")
+
+        if restricted_electives:
+            if restricted_credit_req:
+                output.append(f"Restricted Electives (Choose {restricted_credit_req} credits):")
+            else:
+                output.append("Restricted Electives:")
+
+            for course in restricted_electives:
+                formatted = format_course_for_output(course)
+                if formatted:
+                    output.append(f"- {formatted}")
+            output.append("")
+
+        return "\n".join(output)
+
+
+@lru_cache(maxsize=DEGREE_CACHE_SIZE)
+def _load_degree(path: str, mtime_ns: int) -> DegreeRequirements:
+    # the mtime is only part of the key, an edited file misses and the stale entry ages out
+    return DegreeRequirements.from_file(path)
+
+
+def load_degree(path: str) -> DegreeRequirements:
+    """Parsed degree file, cached until the file changes."""
+    path = os.path.abspath(path)
+    return _load_degree(path, os.stat(path).st_mtime_ns)
@@ -1,9 +1,10 @@
 from rapidfuzz import process
 import json
-import fitz
+import hashlib
 import re
 import os
 import sqlite3
+from functools import lru_cache
 from typing import Set, Tuple, List, Dict, Optional
 
 
@@ -73,14 +74,69 @@ def get_completed_courses(transcript: dict):
 
     return completed
 
-def degree2file(program: str, degree: str):
+# DEGREE FILE RESOLUTION
+
+DEGREES_DIR = os.path.join(os.path.dirname(__file__), "vault", "degrees")
+
+# abbreviated program names, shared by degree2file() and normalize_degree_format()
+DEGREE_ABBREVIATIONS = {
+    "bs": "bachelor_of_science",
+    "ba": "bachelor_of_arts",
+    "bfa": "bachelor_of_fine_arts",
+    "b.s.": "bachelor_of_science",
+    "b.a.": "bachelor_of_arts",
+    "b.f.a.": "bachelor_of_fine_arts"
+}
+
+# degree2file() warns about matches scoring below this (0-100)
+DEGREE_MATCH_CONFIDENCE = 90.0
+
+# degrees dir -> (directory mtime, sorted filenames, filenames without extension), see load_degree_index()
+_degree_indexes: Dict[str, Tuple[int, List[str], List[str]]] = {}
+
+
+def load_degree_index(degrees_dir: str = DEGREES_DIR) -> Tuple[List[str], List[str]]:
     """
-    Convert a degree name to a file name.
+    List the degree files once per process. The listing is rebuilt when files are
+    added, removed or renamed (directory mtime) or after invalidate_degree_index().
 
     Args:
-        program: The program name (Bachelor of Science, Master of Arts, etc.)
-        degree: The degree name (Computer Science, Finance, etc.)
+        degrees_dir: Directory with one JSON file per degree
+
+    Returns:
+        (filenames, names) where names are the filenames without extension, both sorted
+    """
+    degrees_dir = os.path.abspath(degrees_dir)
+    signature = os.stat(degrees_dir).st_mtime_ns
+
+    cached = _degree_indexes.get(degrees_dir)
+    if cached and cached[0] == signature:
+        return cached[1], cached[2]
+
+    if cached:
+        # resolutions against the old listing are stale
+        _resolve_degree_file.cache_clear()
+
+    files = sorted(os.listdir(degrees_dir))
+    names = [os.path.splitext(f)[0] for f in files]
+    _degree_indexes[degrees_dir] = (signature, files, names)
+    return files, names
+
+
+def invalidate_degree_index(degrees_dir: str = DEGREES_DIR):
+    """Drop the cached degree listing and resolutions so the next lookup re-reads the directory."""
+    _degree_indexes.pop(os.path.abspath(degrees_dir), None)
+    _resolve_degree_file.cache_clear()
+
+
+def degree_file_candidate(program: str, degree: str) -> str:
+    """
+    Filename-style name of a degree ("Bachelor of Science", "Info Systems" ->
+    "bachelor_of_science_in_information_systems"), abbreviated programs expanded.
     """
+    program = program.strip().lower()
+    program = DEGREE_ABBREVIATIONS.get(program, program)
+
     replacements = {
         "info" : "information",
         " ": "_",
@@ -91,23 +147,94 @@ def degree2file(program: str, degree: str):
     # r'info|\ |\&'
 
     # replace all instances of keys with values
-    full_string = f"{program.strip()} in {degree.strip()}".lower()
-    filename_candidate = pattern.sub(lambda m: replacements[m.group(0)], full_string)
-    
-    files = os.listdir(os.path.join(os.path.dirname(__file__), "vault", "degrees"))
-    
-    return process.extract(filename_candidate, files)[0][0]
+    full_string = f"{program} in {degree.strip()}".lower()
+    return pattern.sub(lambda m: replacements[m.group(0)], full_string)
+
+
+@lru_cache(maxsize=256)
+def _resolve_degree_file(program: str, degree: str, degrees_dir: str) -> Tuple[str, float]:
+    files, names = _degree_indexes[degrees_dir][1:]
+    match = process.extractOne(degree_file_candidate(program, degree), names)
+    if match is None:
+        raise FileNotFoundError(f"No degree files in {degrees_dir}")
+    _, score, i = match
+    return files[i], score
+
+
+def resolve_degree_file(program: str, degree: str, degrees_dir: str = DEGREES_DIR) -> Tuple[str, float]:
+    """
+    Find the degree file closest to a program and major, cached per (program, major).
+
+    Args:
+        program: The program name (Bachelor of Science, Master of Arts, etc.)
+        degree: The degree name (Computer Science, Finance, etc.)
+        degrees_dir: Directory with one JSON file per degree
 
+    Returns:
+        (filename, confidence) where confidence is the rapidfuzz score (0-100),
+        100 when the name matches a file exactly
+    """
+    load_degree_index(degrees_dir)
+    return _resolve_degree_file(program, degree, os.path.abspath(degrees_dir))
 
-def pdf_to_text(pdf_path):
-    doc = fitz.open(pdf_path)
-    transcript = ""
-    # Iterate through each page and extract text
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        transcript += page.get_text() + "\n"
-    doc.close()
-    return transcript
+
+def degree2file(program: str, degree: str):
+    """
+    Convert a degree name to a file name.
+
+    Args:
+        program: The program name (Bachelor of Science, Master of Arts, etc.)
+        degree: The degree name (Computer Science, Finance, etc.)
+    """
+    filename, confidence = resolve_degree_file(program, degree)
+    if confidence < DEGREE_MATCH_CONFIDENCE:
+        print(f"[WARNING] Low confidence degree match ({confidence:.0f}): {program} in {degree} -> {filename}")
+    return filename
+
+
+def transcript_hash(transcript: dict) -> str:
+    """
+    Content hash of a transcript dict, the same for equal transcripts regardless of key order.
+
+    Args:
+        transcript: Student transcript dictionary
+
+    Returns:
+        Hex sha256 digest
+    """
+    data = json.dumps(transcript, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def pdf_pages(source):
+    """
+    Text of a PDF, extracted one page at a time.
+
+    Args:
+        source: path of the PDF, its bytes, or a binary file object (e.g. an uploaded file)
+
+    Yields:
+        str: text of the next page
+    """
+    # PyMuPDF is only needed to parse uploads, importing it costs every process that loads helpers
+    import fitz
+
+    if isinstance(source, (str, os.PathLike)):
+        doc = fitz.open(source)
+    else:
+        data = source.read() if hasattr(source, "read") else source
+        doc = fitz.open(stream=data, filetype="pdf")
+
+    try:
+        # pages are loaded and released one by one
+        for page in doc:
+            yield page.get_text()
+    finally:
+        doc.close()
+
+def pdf_to_text(source):
+    """Text of every page of a PDF (see `pdf_pages`), each followed by a newline."""
+    return "".join(page + "\n" for page in pdf_pages(source))
 
 # currently works only on rowan transcripts from PDFS
 def parse_transcript(data: str):
@@ -148,161 +275,247 @@ def parse_transcript(data: str):
 
     return student_info
 
-def extract_info(pdf_path, save=None):
-    transcript = pdf_to_text(pdf_path)
-
-    # get student info section
-    sections = re.split(r'(?m)^(?=[A-Z][A-Z ]+$)', transcript)
-    student_info_text = sections[1]
-
-    # get student info
-    student_info: dict = parse_transcript(student_info_text)
-
-    # split by term
-    term_pattern = r"(?i)((?:Fall|Spring|Summer|Winter) (?:[0-9]{4}))\n"
-    blocks = re.split(term_pattern, transcript)
-
-    # extract credits, quality points, gpa, etc.. from "Overall" section
-    overalls = re.search(r"Overall:?\s*(.*?)(?=[A-Za-z]|$)", transcript, re.DOTALL)
-    assert overalls, "Overall section not found"
-    overalls = [float(x) for x in overalls.group(1).split("\n")[:6]]
-    ampt_hrs, pasd_hrs, ernd_hrs, gpa_hrs, qual_pts, gpa = overalls
-    student_info["attempted_credits"] = ampt_hrs
-    student_info["passed_credits"] = pasd_hrs
-    student_info["earned_credits"] = ernd_hrs
-    student_info["gpa_credits"] = gpa_hrs
-    student_info["quality_points"] = qual_pts
-    student_info["gpa"] = gpa
-
-    subj_ptrn = r"[A-Z]{2,4}" # Subject Code
-    crse_ptrn = r"\d{5}" # Course Number
-    cmps_ptrn = r"Main|Online|Off-campus" # Campus, Off-campus also exists, I added it in - David
-    lvl_ptrn = r"UG|GR|[A-Z]{2}" # Level
-    ttl_ptrn = r"[A-Z0-9\s\-/&:(),]+?" # Title - more specific pattern
-    grde_ptrn = r"[A-Z]{1,2}[+-]?|W|TR" # Grade including W and TR
-    crd_ptrn = r"\d+\.\d+" # Credits
-    qual_ptrn = r"\d+\.\d+" # Quality Points
-
-
-    # Pattern for transfer credits (no campus, level, or quality points)
-    transfer_pattern = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)" % 
-                                (subj_ptrn, 
-                                crse_ptrn, 
-                                ttl_ptrn, 
-                                grde_ptrn, 
-                                crd_ptrn))
-
-    # Pattern for completed courses
-    course_pattern = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)" % 
-                                (subj_ptrn, 
-                                crse_ptrn, 
-                                cmps_ptrn, 
-                                lvl_ptrn, 
-                                ttl_ptrn, 
-                                grde_ptrn, 
-                                crd_ptrn, 
-                                qual_ptrn))
-
-    # Pattern for in-progress courses (no grades, only credit hours)
-    inprog_pattern = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(.+?)\s+(%s)(?=\s*(?:[A-Z]{2,4}\s+\d{5}|\s*$|\s*\w+\s*Transcript))" % 
-                                (subj_ptrn, 
-                                crse_ptrn, 
-                                cmps_ptrn, 
-                                lvl_ptrn, 
-                                crd_ptrn), re.DOTALL)
-
-    cur_term = None
-    for i, block in enumerate(blocks):
+# transcript layout, compiled once instead of on every extract_info call
+subj_ptrn = r"[A-Z]{2,4}" # Subject Code
+crse_ptrn = r"\d{5}" # Course Number
+cmps_ptrn = r"Main|Online|Off-campus" # Campus, Off-campus also exists, I added it in - David
+lvl_ptrn = r"UG|GR|[A-Z]{2}" # Level
+ttl_ptrn = r"[A-Z0-9\s\-/&:(),]+?" # Title - more specific pattern
+grde_ptrn = r"[A-Z]{1,2}[+-]?|W|TR" # Grade including W and TR
+crd_ptrn = r"\d+\.\d+" # Credits
+qual_ptrn = r"\d+\.\d+" # Quality Points
+
+# an all caps line starts a section, the student information is the first one
+SECTION_START = re.compile(r'(?m)^(?=[A-Z][A-Z ]+$)')
+# "Fall 2023" on its own line starts the courses of a term.
+# the lookaheads on the first letter don't change what matches, they let the regex engine
+# skip ahead to candidate positions instead of trying the whole pattern at every character
+TERM_SPLIT = re.compile(r"(?i)(?=[fsw])((?:Fall|Spring|Summer|Winter) (?:[0-9]{4}))\n")
+TERM_HEADING = re.compile(r"(?i)(Fall|Spring|Summer|Winter) (\d{4})")
+TRANSFER_HEADING = re.compile(r"(?i)(?=t)(?:TRANSFER CREDIT ACCEPTED BY INSTITUTION)")
+OVERALL_TOTALS = re.compile(r"Overall:?\s*(.*?)(?=[A-Za-z]|$)", re.DOTALL)
+WHITESPACE = re.compile(r'\s+')
+
+# Pattern for transfer credits (no campus, level, or quality points)
+TRANSFER_ROW = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)" % 
+                          (subj_ptrn, 
+                          crse_ptrn, 
+                          ttl_ptrn, 
+                          grde_ptrn, 
+                          crd_ptrn))
+
+# Pattern for completed courses
+COURSE_ROW = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)" % 
+                        (subj_ptrn, 
+                        crse_ptrn, 
+                        cmps_ptrn, 
+                        lvl_ptrn, 
+                        ttl_ptrn, 
+                        grde_ptrn, 
+                        crd_ptrn, 
+                        qual_ptrn))
+
+# Pattern for in-progress courses (no grades, only credit hours)
+INPROGRESS_ROW = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(.+?)\s+(%s)(?=\s*(?:[A-Z]{2,4}\s+\d{5}|\s*$|\s*\w+\s*Transcript))" % 
+                            (subj_ptrn, 
+                            crse_ptrn, 
+                            cmps_ptrn, 
+                            lvl_ptrn, 
+                            crd_ptrn), re.DOTALL)
+
+def extract_info(source, save=None):
+    """
+    Parse a transcript PDF. Pages are parsed as they are extracted, so memory stays flat
+    however long the transcript is.
+
+    Args:
+        source: path of the transcript PDF, its bytes, or a binary file object (e.g. an uploaded file)
+        save: path to also write the parsed transcript to as JSON
+
+    Returns:
+        dict: student information with transfer, inprogress and completed courses
+    """
+    parser = TranscriptParser()
+    for page in pdf_pages(source):
+        parser.feed(page + "\n")
+    student_info = parser.close()
+
+    if save:
+        with open(save, "w") as f:
+            json.dump(student_info, f, indent=4)
+    
+    return student_info
+
+def parse_transcript_text(transcript: str) -> dict:
+    """Parse the whole text of a transcript PDF (see `extract_info`)."""
+    parser = TranscriptParser()
+    parser.feed(transcript)
+    return parser.close()
+
+# longest text TERM_SPLIT can match ("Summer 2024\n"), a term starting closer than this to
+# the end of the text seen so far may still be cut off by the page break
+TERM_SPLIT_MAX = 12
+
+class TranscriptParser:
+    """
+    Incremental transcript parser. Text is fed page by page and every term block is parsed
+    and dropped as soon as the next term heading arrives, so only the unfinished block is
+    kept in memory. The result is the same as parsing the whole text at once.
+
+    Attributes
+    ----------
+    buffer : str
+        text fed but not parsed yet
+    student_info : dict or None
+        fields of the student information section, once the section is complete
+    overall : str or None
+        numbers after "Overall", once they are complete
+    courses : dict
+        transfer, inprogress and completed course lists found so far
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.student_info = None
+        self.overall = None
+        self.courses = {}
+        self.cur_term = None
+
+    def feed(self, text: str):
+        """Add the next piece of transcript text (e.g. one page)."""
+        self.buffer += text
+        self._consume(final=False)
+
+    def close(self) -> dict:
+        """
+        Parse the rest of the text.
+
+        Returns:
+            dict: student information with transfer, inprogress and completed courses
+        """
+        self._consume(final=True)
+
+        assert self.overall is not None, "Overall section not found"
+        overalls = [float(x) for x in self.overall.split("\n")[:6]]
+        ampt_hrs, pasd_hrs, ernd_hrs, gpa_hrs, qual_pts, gpa = overalls
+
+        student_info = self.student_info
+        student_info["attempted_credits"] = ampt_hrs
+        student_info["passed_credits"] = pasd_hrs
+        student_info["earned_credits"] = ernd_hrs
+        student_info["gpa_credits"] = gpa_hrs
+        student_info["quality_points"] = qual_pts
+        student_info["gpa"] = gpa
+        student_info.update(self.courses)
+        return student_info
+
+    def _consume(self, final: bool):
+        # text is only dropped once the student information section and the "Overall"
+        # numbers before it are known, both are searched in the whole text
+        if self.student_info is None and not self._read_student_info(final):
+            return
+
+        limit = len(self.buffer) if final else len(self.buffer) - TERM_SPLIT_MAX
+        if self.overall is None:
+            overall = OVERALL_TOTALS.search(self.buffer)
+            end = overall.end() if overall else 0
+            # complete once a letter follows, at the end of the text it may still grow
+            if overall and (final or (end < len(self.buffer) and self.buffer[end].isascii() and self.buffer[end].isalpha())):
+                self.overall = overall.group(1)
+            elif overall:
+                limit = min(limit, overall.start())
+
+        start = 0
+        for match in TERM_SPLIT.finditer(self.buffer):
+            if match.end() > limit:
+                break
+            self._parse_block(self.buffer[start:match.start()])
+            self._parse_block(match.group(1))
+            start = match.end()
+
+        if final:
+            self._parse_block(self.buffer[start:])
+            self.buffer = ""
+        else:
+            self.buffer = self.buffer[start:]
+
+    def _read_student_info(self, final: bool) -> bool:
+        # student info section, from the first all caps line to the next one.
+        # a line is only known to be (or not be) all caps once its newline arrived
+        starts = SECTION_START.finditer(self.buffer)
+        first = next(starts, None)
+        second = next(starts, None)
+
+        if not final:
+            if second is None or "\n" not in self.buffer[second.start():]:
+                return False
+        assert first, "Student information not found"
+
+        end = second.start() if second else len(self.buffer)
+        self.student_info = parse_transcript(self.buffer[first.start():end])
+        return True
+
+    def _parse_block(self, block: str):
         # found a term, the next block is the courses in that term
-        match = re.match(r"(?i)(Fall|Spring|Summer|Winter) (\d{4})", block)
+        match = TERM_HEADING.match(block)
         if match and len(block) < 20:   
-            cur_term = match.group(0)
-            continue
+            self.cur_term = match.group(0)
+            return
         
         # found transfer credits
-        if re.search(r"(?i)(?:TRANSFER CREDIT ACCEPTED BY INSTITUTION)", block):
-            # init transfer courses list
-            if "transfer" not in student_info:
-                student_info["transfer"] = []
-
+        if TRANSFER_HEADING.search(block):
             # find all transfer courses and add them to list
-            for match in re.finditer(transfer_pattern, block):
-                title = re.sub(r'\s+', ' ', match.group(3)).strip()
-                student_info["transfer"].append({
+            transfer = self.courses.setdefault("transfer", [])
+            for match in TRANSFER_ROW.finditer(block):
+                transfer.append({
                     "subject": match.group(1),
                     "course_number": match.group(2),
-                    "title": title,
+                    "title": WHITESPACE.sub(' ', match.group(3)).strip(),
                     "grade": match.group(4),
                     "credits": match.group(5)
                 })
-            continue
+            return
 
         # Check if this block contains in-progress courses (no grades, only credit hours)
         # For in-progress courses, the format is different - they have headers but no grades
-        has_credit_hours_header = "Credit Hours" in block
-        has_subject_course_header = "Subject" in block and "Course" in block
-        
         # If it has the headers but no grades, it's likely in-progress
-        if has_credit_hours_header and has_subject_course_header:
-            # Use inprog_pattern to extract course information
-            inprog_matches = list(re.finditer(inprog_pattern, block))
+        if "Credit Hours" in block and "Subject" in block and "Course" in block:
+            inprog_matches = list(INPROGRESS_ROW.finditer(block))
             if inprog_matches:
-                # init inprogress courses list
-                if "inprogress" not in student_info:
-                    student_info["inprogress"] = [{
-                        "term": cur_term,
-                        "courses": []
-                    }]
-                elif student_info["inprogress"][-1]["term"] != cur_term:
-                    student_info["inprogress"].append({
-                        "term": cur_term,
-                        "courses": []
-                    })
-                
-                # Extract all in-progress courses from this block
+                courses = self._term_courses("inprogress")
                 for match in inprog_matches:
-                    # Clean up the title by removing extra whitespace and newlines
-                    title = re.sub(r'\s+', ' ', match.group(5)).strip()
-                    
-                    student_info["inprogress"][-1]["courses"].append({
+                    courses.append({
                         "subject": match.group(1),
                         "course_number": match.group(2),
                         "campus": match.group(3),
                         "level": match.group(4),
-                        "title": title,
+                        # Clean up the title by removing extra whitespace and newlines
+                        "title": WHITESPACE.sub(' ', match.group(5)).strip(),
                         "credits": match.group(6)
                     })
-                continue
+                return
 
         # rest should be completed credits
-        for match in re.finditer(course_pattern, block):
-            if "completed" not in student_info:
-                student_info["completed"] = [{
-                    "term": cur_term,
-                    "courses": []
-                }]
-            elif student_info["completed"][-1]["term"] != cur_term:
-                student_info["completed"].append({
-                    "term": cur_term,
-                    "courses": []
-                })
-            title = re.sub(r'\s+', ' ', match.group(5)).strip()
-            student_info["completed"][-1]["courses"].append({
+        courses = None
+        for match in COURSE_ROW.finditer(block):
+            if courses is None:
+                courses = self._term_courses("completed")
+            courses.append({
                 "subject": match.group(1),
                 "course_number": match.group(2),
                 "campus": match.group(3),
                 "level": match.group(4),
-                "title": title,
+                "title": WHITESPACE.sub(' ', match.group(5)).strip(),
                 "grade": match.group(6),
                 "credits": match.group(7),
                 "quality_points": match.group(8)
             })
-    
-    if save:
-        with open(save, "w") as f:
-            json.dump(student_info, f, indent=4)
-    
-    return student_info
+
+    def _term_courses(self, kind: str) -> list:
+        # course list of the current term of a kind ("completed", "inprogress"), a new term is appended when it changes
+        terms = self.courses.setdefault(kind, [])
+        if not terms or terms[-1]["term"] != self.cur_term:
+            terms.append({"term": self.cur_term, "courses": []})
+        return terms[-1]["courses"]
 
 # david's work
 def json_to_toon_robust(data, indent="    ", level=0):
@@ -585,52 +798,65 @@ def format_course_for_output(course):
     
     return " ".join(parts)
 
-def parse_degree_requirements_from_transcript(degree:dict, transcript:dict):
+def parse_degree_requirements_from_transcript(degree, transcript:dict):
+    """
+    Courses left in each credit-bearing section of a degree for a student.
+
+    Args:
+        degree: DegreeRequirements from core.degrees.load_degree (a raw degree dict is parsed here)
+        transcript: Student transcript dictionary
+
+    Returns:
+        Dict of section heading -> total_credits, completed, completed_credits, not_completed,
+        restricted (elective section, any courses adding up to the credits) and
+        groups (("and" | "or", course codes not completed) per requirement block, an "or"
+        block with a completed course has no codes left)
+    """
+    from core.degrees import DegreeRequirements
+
+    if isinstance(degree, dict):
+        degree = DegreeRequirements(degree)
+
     # TODO: Rowan Core and Rowan Experience needs to checked (currently will be completed for all)
     completed = get_completed_courses(transcript)
     courses_left = {}
-    for head in degree['content'].keys():
-        # find "11 s.h." or "32-33 s.h." in the section headings
-        credits_needed = re.search(r'(\d{1,3})\s?-?\s?((\d{1,3}))?\s+s.h.', head)
-        has_requirements = 'requirements' in degree['content'][head]
-
+    for section in degree.sections:
         # if required credits is in section heading, and it contains requirements (a.k.a courses) under heading
-        if credits_needed and has_requirements:
-            requirements = degree['content'][head]['requirements']
-            
-            # extract the required credits to complete this section
-            _frst = credits_needed.group(1)
-            _scnd = credits_needed.group(2)
+        if section.credits and section.has_requirements:
+            head = section.heading
 
             # if we find 11 s.h., this would be (11, 11) credits
             # if we find 11-12 s.h., this would be (11, 12) credits
-            _frst = float(_frst)
-            _scnd = float(_scnd) if _scnd else _frst
+            _frst, _scnd = section.credits
 
             # initalize to accumulate unfinished courses in the section
             courses_left[head] = {
                 'total_credits': [_frst, _scnd],
                 'completed': False,
                 'completed_credits': 0,
-                'not_completed': []
+                'not_completed': [],
+                'restricted': section.restricted,
+                'groups': []
             }
 
             # each block is an "and" block or and "or" block of courses
-            for block in requirements:
+            for block_type, block_courses in section.groups:
                 # formats the courses in course codes to check with transcript course codes
                 req_crses = {f"{crse['subject']} {crse['course_number']}":{
                                 "title": crse['title'],
-                                "credits": crse['credits'] } for crse in block['courses']}
+                                "credits": crse['credits'] } for crse in block_courses}
                 completed_crses = set(completed) & set(req_crses)     
 
                 # if there is any completed course in the or block, then the block is satisfied 
                 not_completed = []
-                if block['type'] == 'or':
+                if block_type == 'or':
                     not_completed += [] if len(completed_crses) > 0 else req_crses 
                 else:
-                    not_completed += list(set(req_crses) - completed_crses)
+                    # kept in degree file order so the context is the same on every request
+                    not_completed += [_c for _c in req_crses if _c not in completed_crses]
 
                 courses_left[head]['not_completed'] = {_c: req_crses[_c] for _c in not_completed}
+                courses_left[head]['groups'].append((block_type, list(not_completed)))
 
                 # accumulate completed credits
                 courses_left[head]['completed_credits'] += sum([completed[crse]['credits'] for crse in completed_crses])
@@ -647,9 +873,9 @@ def parse_degree_requirements_from_transcript(degree:dict, transcript:dict):
 
 
 def parse_degree_requirements(json_filepath):
-    # TODO: optimize this function, currently there are multiple passes over the data
     """
     Parse degree requirements from a structured JSON file and return formatted text output.
+    The file is parsed once and cached, see core.degrees.load_degree.
     
     Args:
         json_filepath: Path to the JSON file containing degree information
@@ -657,155 +883,9 @@ def parse_degree_requirements(json_filepath):
     Returns:
         Formatted string with degree requirements
     """
+    from core.degrees import load_degree
 
-    data = open(json_filepath, 'r', encoding='utf-8').read()
-    data = json.loads(data)
-    
-    output = []
-    
-    # Extract degree name (Turned OFf) 
-    degree_name = data.get("name", "Unknown Degree")
-    #output.append(f"Degree Name: {degree_name}")
-    #output.append("")
-    
-    # Extract total credits from content first
-    content = data.get("content", {})
-    total_credits = extract_total_credits(content)
-    
-    # Output total credits at the top due to its importance
-    if total_credits:
-        output.append(f"Total Credits: {total_credits}")
-        output.append("")
-    
-    # Extract description from first content section
-    description = None
-    for header, value in content.items():
-        if isinstance(value, list) and value and degree_name.lower() in header.lower():
-            description = value[0] if value else None
-            break
-    
-    # Output description due to its importance
-    if description:
-        output.append(f"Description: {description}")
-        output.append("")
-    
-    # TODO: manually add the rowan core, because it is the same for all rowan students
-    # # Parse Rowan Core requirements
-    # rowan_core_courses = []
-    # for header, value in content.items():
-    #     if "rowan core" in header.lower():
-    #         # Extract courses from notes or list format
-    #         if isinstance(value, dict) and "notes" in value:
-    #             for note in value.get("notes", []):
-    #                 courses = extract_courses_from_text(note)
-    #                 rowan_core_courses.extend(courses)
-    #         elif isinstance(value, list):
-    #             for item in value:
-    #                 if isinstance(item, str) and re.search(r"[A-Z]{2,5}\s+\d{3,5}", item):
-    #                     courses = extract_courses_from_text(item)
-    #                     rowan_core_courses.extend(courses)
-    
-    # # Output Rowan Core requirements due to its importance
-    # if rowan_core_courses:
-    #     output.append("Rowan Core Requirements:")
-    #     for course in rowan_core_courses:
-    #         formatted = format_course_for_output(course)
-    #         if formatted:
-    #             output.append(f"- {formatted}")
-    #     output.append("")
-    
-    # Parse all required AND courses and OR course groups
-    required_courses = []
-    choice_groups = []
-    restricted_electives = []
-    restricted_credit_req = None
-    
-    for header, value in content.items():
-        # Skip certain sections
-        if any(skip in header.lower() for skip in ["rowan core", "rowan experience", "free elective", "total required"]):
-            continue
-        
-        # Check if this is a restricted electives section
-        is_restricted = "restricted elective" in header.lower() or "elective" in header.lower()
-        
-        # Extract credit requirement for restricted electives
-        if is_restricted and not restricted_credit_req:
-            match = re.search(r'(\d+)\s*s\.h\.', header)
-            if match:
-                restricted_credit_req = match.group(1)
-        
-        # Handle dict format sections
-        if isinstance(value, dict) and "requirements" in value:
-            requirements = value.get("requirements", [])
-            
-            for group in requirements:
-                if not isinstance(group, dict) or "courses" not in group:
-                    continue
-                
-                group_type = group.get("type", "and").lower()
-                courses = group.get("courses", [])
-                
-                # Handle OR groups
-                if group_type == "or":
-                    # Filter out non-course entries
-                    valid_courses = [c for c in courses if c.get("subject") and c.get("course_number")]
-                    if valid_courses:
-                        choice_groups.append(valid_courses)
-                # Handle AND groups
-                elif group_type == "and":
-                    if is_restricted:
-                        restricted_electives.extend(courses)
-                    else:
-                        required_courses.extend(courses)
-        # Handle list format sections
-        elif isinstance(value, list):
-            # Handle list format sections that may contain AND/OR markers
-            for item in value:
-                if isinstance(item, str):
-                    if item == "AND" or item == "OR":
-                        continue
-                    # Check if item is a formatted course
-                    if re.search(r"[A-Z]{2,5}\s+\d{3,5}", item):
-                        parsed = course_transformer_into_json(item)
-                        if parsed.get("subject") and parsed.get("course_number"):
-                            if is_restricted:
-                                restricted_electives.append(parsed)
-                            else:
-                                required_courses.append(parsed)
-    
-    # Output required courses
-    if required_courses:
-        output.append("Required Courses:")
-        for course in required_courses:
-            formatted = format_course_for_output(course)
-            if formatted:
-                output.append(f"- {formatted}")
-        output.append("")
-    
-    # Output choice groups
-    for i, group in enumerate(choice_groups):
-        if len(group) > 1:
-            output.append("Choose One:")
-            for course in group:
-                formatted = format_course_for_output(course)
-                if formatted:
-                    output.append(f"- {formatted}")
-            output.append("")
-    
-    # Output restricted electives
-    if restricted_electives:
-        if restricted_credit_req:
-            output.append(f"Restricted Electives (Choose {restricted_credit_req} credits):")
-        else:
-            output.append("Restricted Electives:")
-        
-        for course in restricted_electives:
-            formatted = format_course_for_output(course)
-            if formatted:
-                output.append(f"- {formatted}")
-        output.append("")
-    
-    return "\n".join(output)
+    return load_degree(json_filepath).text
 
 
 def normalize_course_code(code: str) -> str:
@@ -840,18 +920,8 @@ def normalize_degree_format(degree_str: str) -> Optional[str]:
     if "_" in normalized and " " not in normalized:
         return normalized
 
-    # Expand common abbreviations
-    abbreviations = {
-        "bs": "bachelor_of_science",
-        "ba": "bachelor_of_arts",
-        "bfa": "bachelor_of_fine_arts",
-        "b.s.": "bachelor_of_science",
-        "b.a.": "bachelor_of_arts",
-        "b.f.a.": "bachelor_of_fine_arts"
-    }
-
     # Check if starts with abbreviation
-    for abbr, full in abbreviations.items():
+    for abbr, full in DEGREE_ABBREVIATIONS.items():
         if normalized.startswith(abbr + " in "):
             # e.g., "bs in data science" -> "bachelor_of_science in data science"
             normalized = full + "_in_" + normalized[len(abbr) + 4:]
@@ -929,41 +999,79 @@ def normalize_course_title_for_search(title: str) -> str:
 
 # PREREQUISITE CHECKING FUNCTIONS
 
-def get_course_prerequisites(course_code: str, db_path: str = "core/courses.db") -> Optional[Dict]:
+COURSES_DB_PATH = os.path.join(os.path.dirname(__file__), "courses.db")
+
+# db path -> (file signature, {course_code: row dict}), see load_course_prerequisites()
+_prerequisite_tables: Dict[str, Tuple[Tuple[int, int], Dict[str, Dict]]] = {}
+
+
+def load_course_prerequisites(db_path: str = COURSES_DB_PATH) -> Dict[str, Dict]:
     """
-    Query the courses.db database for prerequisite information.
+    Load every row of the courses.db prerequisite table with a single query.
+    The table is cached per process and reloaded when the database file changes
+    (mtime/size) or after invalidate_course_prerequisites().
 
     Args:
-        course_code: Course code to look up (e.g., "MATH 01132")
         db_path: Path to the SQLite database
 
     Returns:
-        Dict with keys: course_code, expr, valid, not_found
-        Returns None if course not found
+        Dict of course_code -> dict with keys: course_code, expr, valid, not_found
+        Returns an empty dict if the database can not be read
     """
+    db_path = os.path.abspath(db_path)
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        # Normalize the course code for lookup
-        normalized_code = course_code.strip().upper()
-
-        cursor.execute("SELECT * FROM courses WHERE course_code = ?", (normalized_code,))
-        row = cursor.fetchone()
-        conn.close()
+        stat = os.stat(db_path)
+    except OSError:
+        return {}
+    signature = (stat.st_mtime_ns, stat.st_size)
 
-        if row is None:
-            return None
+    cached = _prerequisite_tables.get(db_path)
+    if cached and cached[0] == signature:
+        return cached[1]
 
-        return {
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute("SELECT * FROM courses").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return {}
+
+    table = {
+        row["course_code"]: {
             "course_code": row["course_code"],
             "expr": row["expr"],
             "valid": row["valid"],
             "not_found": json.loads(row["not_found"]) if row["not_found"] else []
         }
-    except Exception:
-        return None
+        for row in rows
+    }
+    _prerequisite_tables[db_path] = (signature, table)
+    return table
+
+
+def invalidate_course_prerequisites(db_path: str = COURSES_DB_PATH):
+    """Drop the cached prerequisite table so the next lookup re-reads the database."""
+    _prerequisite_tables.pop(os.path.abspath(db_path), None)
+
+
+def get_course_prerequisites(course_code: str, db_path: str = COURSES_DB_PATH) -> Optional[Dict]:
+    """
+    Look up prerequisite information from the courses.db database.
+
+    Args:
+        course_code: Course code to look up (e.g., "MATH 01132")
+        db_path: Path to the SQLite database
+
+    Returns:
+        Dict with keys: course_code, expr, valid, not_found
+        Returns None if course not found
+    """
+    # Normalize the course code for lookup
+    normalized_code = course_code.strip().upper()
+    return load_course_prerequisites(db_path).get(normalized_code)
 
 
 def evaluate_prerequisites(prereq_expr: str, completed_courses: Set[str]) -> Tuple[bool, List[Dict]]:
@@ -1,9 +1,12 @@
 from typing import Dict, Any, List, Optional
 
-from torch._dynamo.bytecode_transformation import inst_has_op_bits
 from core.tools import AdvisorTools
 from core.helpers import *
 import requests
+import asyncio
+import httpx
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import json
 import re
 
@@ -119,8 +122,11 @@ WORKFLOW:
 
 TOOL USAGE - CRITICAL:
 - "What's in this major?" -> get_degree_courses()
+- "When can I graduate?" / "Plan my remaining semesters" -> plan_degree()
 - "Tell me about the major" -> get_degree_description()
 - "Can I take [specific course]?" -> get_course_info(course="...") - PASS THE USER'S EXACT WORDS, don't try to guess course codes
+- "What do I need before [course]?" / "How long until I can take [course]?" -> get_prerequisite_chain(course="...")
+- "What opens up after [course]?" -> get_unlocked_courses(course="...")
 - "What CS courses can I take?" -> search_courses(subject="CS", eligible_only=True)
 - "Show me all 3-credit courses" -> search_courses(credits="3")
 - "What machine learning courses exist?" -> search_courses(keyword="machine learning")
@@ -153,6 +159,9 @@ For large result sets, be selective and show 5-8 most relevant courses with full
 # TODO: PLAY WITH TONE VOICE OF THE AI!
 
 
+# highest temperature a sample of sample_recommendations is sent with
+MAX_SAMPLE_TEMPERATURE = 1.0
+
 COURSE_RECOMMEND_SCHEMA = {
     "type": "object",
     "properties": {
@@ -166,6 +175,12 @@ COURSE_RECOMMEND_SCHEMA = {
     "required": ["courses"]
 }
 
+def course_recommend_schema(courses) -> Dict[str, Any]:
+    '''COURSE_RECOMMEND_SCHEMA that only allows the given course codes'''
+    schema = json.loads(json.dumps(COURSE_RECOMMEND_SCHEMA))
+    schema["properties"]["courses"]["items"]["enum"] = list(courses)
+    return schema
+
 RECOMMEND_SCHEMA = {
     "type": "json_schema",
     "json_schema": {
@@ -203,7 +218,15 @@ class LLMAgent:
                  display_thinking: bool = True,
                  temperature: float = 0.0, # Lower temperature for more deterministic responses
                  top_p: float = 0.9, # Nucleus sampling parameter
-                 frequency_penalty: float = 0.0 # No penalty to allow repetition if needed
+                 frequency_penalty: float = 0.0, # No penalty to allow repetition if needed
+                 connect_timeout: float = 10.0, # seconds to open a connection to the LLM server
+                 read_timeout: float = 300.0, # seconds to wait for the next chunk of a response
+                 max_connections: int = 100, # open connections to the LLM server shared by all chats
+                 max_tool_workers: int = 8, # tool calls running at the same time, shared by all chats
+                 use_planner: bool = True, # next_semester takes the first term of the degree plan instead of asking the LLM
+                 recommend_samples: int = 1, # recommendations next_semester asks the LLM for at once, 1 asks one at a time
+                 recommend_concurrency: int = 2, # recommendation requests sent to the LLM server at the same time, shared by all chats
+                 sample_temperature_step: float = 0.2 # temperature added per sample, so the samples differ
                  ): 
 
         self.instruction_prompt = instruction_prompt
@@ -215,9 +238,31 @@ class LLMAgent:
         self.top_p = top_p
         self.frequency_penalty = frequency_penalty
 
+        # Keep-alive connections to the LLM server, reused across iterations and requests.
+        # The async client serves the chat loop, the session serves blocking calls (next_semester)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.session = requests.Session()
+        self._http_client: Optional[httpx.AsyncClient] = None
+
         # Initialize all tools automatically from AdvisorTools
         self.tools = AdvisorTools()
 
+        # Tools block (next_semester waits on the LLM), they run in this pool instead of on the event loop
+        self.tool_pool = ThreadPoolExecutor(max_workers=max_tool_workers, thread_name_prefix="advisor-tool")
+
+        # the LLM loop of next_semester is only used when the planner has no courses to recommend
+        self.use_planner = use_planner
+
+        # best-of-N sampling in next_semester, keep the concurrency at or below OLLAMA_NUM_PARALLEL
+        # so a single Ollama instance does not queue them
+        self.recommend_samples = recommend_samples
+        self.recommend_concurrency = recommend_concurrency
+        self.sample_temperature_step = sample_temperature_step
+        # every next_semester round runs in its own event loop, the limit is shared by all of them
+        self._recommend_limit = threading.BoundedSemaphore(max(1, recommend_concurrency))
+
         # Limit iterations to prevent infinite loops
         self.max_iterations = 8
 
@@ -244,6 +289,27 @@ class LLMAgent:
                     }
                 }
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": "plan_degree",
+                    "description": (
+                        "Get a semester-by-semester plan of every course the student still needs, with prerequisites "
+                        "in order and the expected graduation semester. "
+                        "Use this for questions like 'When can I graduate?' or 'Plan my remaining semesters'"
+                    ),
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "max_credits": {
+                                "type": "integer",
+                                "description": "Most credits the student wants to take per semester, 15 if not given"
+                            }
+                        },
+                        "required": []
+                    }
+                }
+            },
             {
                 "type": "function",
                 "function": {
@@ -323,6 +389,55 @@ class LLMAgent:
                     }
                 }
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": "get_prerequisite_chain",
+                    "description": (
+                        "Get EVERYTHING that must be taken before a course - the whole prerequisite chain, not only the direct prerequisites - "
+                        "with the student's status for each course, the minimum number of semesters of prerequisites, and the fewest courses the student still needs. "
+                        "Use this for planning questions like 'What do I need before Artificial Intelligence?' or 'How long until I can take CS 07340?' "
+                        "instead of calling get_course_info() on each prerequisite."
+                    ),
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "course": {
+                                "type": "string",
+                                "description": (
+                                    "Course identifier - accepts EITHER course code OR course title. "
+                                    "Examples: 'CS 07340', 'Artificial Intelligence', 'calc 3'."
+                                )
+                            }
+                        },
+                        "required": ["course"]
+                    }
+                }
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "get_unlocked_courses",
+                    "description": (
+                        "Get the courses that open up once the student completes a course: courses they can take next, "
+                        "and courses it counts toward that still need other prerequisites. "
+                        "Use this for questions like 'What opens up after Data Structures?' or 'What can I take once I finish CS 04222?'"
+                    ),
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "course": {
+                                "type": "string",
+                                "description": (
+                                    "Course identifier - accepts EITHER course code OR course title. "
+                                    "Examples: 'CS 04222', 'Data Structures and Algorithms', 'calc 2'."
+                                )
+                            }
+                        },
+                        "required": ["course"]
+                    }
+                }
+            },
             {
                 "type": "function",
                 "function": {
@@ -384,6 +499,21 @@ class LLMAgent:
         Returns:
             str: Tool output as formatted text, or error message if tool not found
         '''
+        # results are shared across requests, keyed on the transcript parts the tool reads
+        key = self.tools.tool_cache_key(tool_name, arguments, transcript)
+        if key is not None:
+            result = self.tools.tool_cache.get(key)
+            if result is not None:
+                return result
+
+        result = self._dispatch_tool(tool_name, arguments, transcript)
+
+        # tools report failures as text, do not keep them around
+        if key is not None and isinstance(result, str) and not result.startswith("Error"):
+            self.tools.tool_cache.set(key, result)
+        return result
+
+    def _dispatch_tool(self, tool_name: str, arguments: Dict[str, Any], transcript: Dict[str, Any]) -> str:
         # Data retrieval tools
         # TODO: ADD MORE TOOLS AS NEEDED
         if tool_name == "next_semester":
@@ -396,6 +526,8 @@ class LLMAgent:
                 assert isinstance(recommendation, dict), "Recommendation is not a dictionary"
 
                 out = []
+                if recommendation.get('plan') is not None:
+                    out.append("Planned next semester, prerequisites are met by the completed courses:")
                 for course in recommendation['courses']:
                     course = re.search(self.tools.preqtester.course_pattern, course)
                     if not course:
@@ -404,7 +536,13 @@ class LLMAgent:
                     course = course.group()
                     course = self.tools.preqtester.find_course(course)
                     out.append(f"{course['CourseCode']} - {course['CourseTitle']} ({course['Credits']} credits)")
+                if recommendation.get('free_credits'):
+                    out.append(f"Free electives ({recommendation['free_credits']:g} credits)")
+                if recommendation.get('plan') is not None and recommendation['plan'].graduation_term:
+                    out.append(f"Expected graduation: {recommendation['plan'].graduation_term}")
                 return "\n".join(out)
+        elif tool_name == "plan_degree":
+            return self.tools.get_degree_plan(transcript, arguments.get("max_credits") or 15)
         elif tool_name == "get_degree_courses":
             degree = arguments.get("degree")
             return self.tools.get_degree_courses(transcript, degree)
@@ -416,6 +554,16 @@ class LLMAgent:
             if not course:
                 return "Error: course parameter is required"
             return self.tools.get_course_info(transcript, course)
+        elif tool_name == "get_prerequisite_chain":
+            course = arguments.get("course")
+            if not course:
+                return "Error: course parameter is required"
+            return self.tools.get_prerequisite_chain(transcript, course)
+        elif tool_name == "get_unlocked_courses":
+            course = arguments.get("course")
+            if not course:
+                return "Error: course parameter is required"
+            return self.tools.get_unlocked_courses(transcript, course)
         elif tool_name == "search_courses":
             subject = arguments.get("subject")
             eligible_only = arguments.get("eligible_only", False)
@@ -427,7 +575,19 @@ class LLMAgent:
             return f"Error: Tool {tool_name} not found"
 
 
-    def __call__(self, messages: List[Dict[str, str]], transcript: Optional[Dict[str, Any]] = None):
+    async def run_tool(self, signature: str, tool_name: str, arguments: Dict[str, Any],
+                       transcript: Dict[str, Any]):
+        '''
+        Run a tool in the shared tool pool so the event loop and other tool calls keep going.
+
+        Returns:
+            (signature, tool_name, arguments, result) so callers can match results that finish out of order
+        '''
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.tool_pool, self.execute_tool, tool_name, arguments, transcript)
+        return signature, tool_name, arguments, result
+
+    async def __call__(self, messages: List[Dict[str, str]], transcript: Optional[Dict[str, Any]] = None):
 
         if not transcript:
             yield "No transcript provided"
@@ -458,7 +618,7 @@ class LLMAgent:
             yield f"Initializing conversation with system prompt, message history, and instruction\n"
             yield f"[/THINKING]\n"
 
-        context = self.tools.transcript2context(transcript)
+        context = await asyncio.to_thread(self.tools.transcript2context, transcript)
 
         # Initialize conversation with system message
         conversation_messages = [
@@ -479,6 +639,9 @@ class LLMAgent:
         # Track executed tool calls to prevent duplicates
         executed_tools = {}
 
+        # set once the first answer token has been streamed to the client
+        answer_open = False
+
         # Iterative tool calling loop
         # Try up to max_iterations to get final answer currnetly self.max_iterations = 8
         for iteration in range(self.max_iterations):
@@ -489,13 +652,35 @@ class LLMAgent:
                 yield f"[/THINKING]\n"
 
             try:
-                # Make API call with tool definitions
-                response = self.generate_response(conversation_messages, use_tools=True)
-                response = response['message']
+                # Stream the reply, content tokens are forwarded as they arrive.
+                # A turn is a tool turn if the model emits tool calls, which Ollama sends as their own chunk
+                content = ""
+                tool_calls = []
+                received = False
+                async for chunk in self.stream_response(conversation_messages, use_tools=True):
+                    received = True
+                    message = chunk.get("message") or {}
+                    tool_calls.extend(message.get("tool_calls") or [])
+
+                    token = message.get("content") or ""
+                    if not token:
+                        continue
+                    content += token
 
+                    # hold back leading whitespace until we know there is an answer to show
+                    if not answer_open:
+                        if tool_calls or not content.strip():
+                            continue
+                        answer_open = True
+                        if self.display_thinking:
+                            yield f"\n[AI RESPONSE]\n"
+                        token = content.lstrip()
+                    yield token
+
+                response = {"role": "assistant", "content": content, "tool_calls": tool_calls}
                 print(response)
 
-                if not response:
+                if not received:
                     if self.display_thinking:
                         yield f"\n[THINKING]\n"
                         yield f"No response received from LLM - aborting\n"
@@ -504,8 +689,10 @@ class LLMAgent:
                     return
 
                 # Check if LLM wants to use tools
-                if response.get("tool_calls"):
-                    tool_calls = response["tool_calls"]
+                if tool_calls:
+                    # text streamed before the tool calls stays in the answer, the final answer continues it
+                    if answer_open:
+                        yield "\n\n"
 
                     if self.display_thinking:
                         yield f"\n[THINKING]\n"
@@ -522,7 +709,10 @@ class LLMAgent:
                         "tool_calls": tool_calls
                     })
 
-                    # Execute each tool call
+                    # Start every new tool call at once, they run side by side in the tool pool.
+                    # Results are added to the conversation in the order the LLM asked for them
+                    signatures = []
+                    running = {}
                     for tool_call in tool_calls:
                         function_name = tool_call["function"]["name"]
 
@@ -537,33 +727,45 @@ class LLMAgent:
                         # Create signature for deduplication
                         args_str = ",".join(f"{k}={v}" for k, v in sorted(function_args.items()))
                         signature = f"{function_name}({args_str})"
+                        signatures.append(signature)
 
                         # Check if already executed
                         # Was my fix for Deepseek. Left it in
-                        if signature in executed_tools:
+                        if signature in executed_tools or signature in running:
                             if self.display_thinking:
                                 yield f"Detected duplicate tool call - reusing cached result\n"
                                 yield f"[/THINKING]\n"
-                            result = executed_tools[signature]
                         else:
                             # Execute tool
                             if self.display_thinking:
                                 yield f"Executing tool: {signature}\n"
+                                yield f"[/THINKING]\n"
 
-                            result = self.execute_tool(function_name, function_args, transcript)
-                            executed_tools[signature] = result
+                            running[signature] = asyncio.ensure_future(
+                                self.run_tool(signature, function_name, function_args, transcript))
 
-                            if self.display_thinking:
-                                yield f"Tool execution complete, result cached\n"
-                                yield f"[/THINKING]\n"
+                    # report each tool as it finishes
+                    for done, finished in enumerate(asyncio.as_completed(running.values()), 1):
+                        signature, function_name, function_args, result = await finished
+                        executed_tools[signature] = result
+
+                        if self.display_thinking:
+                            yield f"\n[THINKING]\n"
+                            yield f"Tool execution complete ({done}/{len(running)}): {signature}, result cached\n"
+                            yield f"[/THINKING]\n"
+                            # the chat page would render a tool result inside an open answer
+                            if not answer_open:
                                 yield f"\n[TOOL RESULT: {function_name}]\n{result}\n[/TOOL RESULT]\n"
-                                # DEBUG: Print to terminal
-                                print(f"\n{'='*60}")
-                                print(f"TOOL: {function_name}")
-                                print(f"ARGS: {function_args}")
-                                print(f"RESULT:")
-                                print(result)
-                                print(f"{'='*60}\n")
+                            # DEBUG: Print to terminal
+                            print(f"\n{'='*60}")
+                            print(f"TOOL: {function_name}")
+                            print(f"ARGS: {function_args}")
+                            print(f"RESULT:")
+                            print(result)
+                            print(f"{'='*60}\n")
+
+                    for tool_call, signature in zip(tool_calls, signatures):
+                        function_name = tool_call["function"]["name"]
 
                         # Add tool response to conversation
                         # Generate tool_call_id if not provided by LLM (Ollama doesn't include it)
@@ -572,7 +774,7 @@ class LLMAgent:
                             "role": "tool",
                             "tool_call_id": tool_call_id,
                             "name": function_name,
-                            "content": result
+                            "content": executed_tools[signature]
                         })
 
                     # Continue loop to get final answer
@@ -587,26 +789,15 @@ class LLMAgent:
                     continue
 
                 else:
-                    # No tool calls - LLM is providing final answer
-                    content = response.get("content", "")
-
+                    # No tool calls - LLM provided the final answer, already streamed above
                     if content and content.strip():
                         if self.display_thinking:
+                            yield f"\n[/AI RESPONSE]\n"
                             yield f"\n[THINKING]\n"
                             yield f"LLM provided final answer\n"
                             yield f"Answer length: {len(content)} chars\n"
                             yield f"[/THINKING]\n"
 
-                        # Stream the final answer
-                        if self.display_thinking:
-                            yield f"\n[AI RESPONSE]\n"
-
-                        for char in content:
-                            yield char
-
-                        if self.display_thinking:
-                            yield f"\n[/AI RESPONSE]\n"
-
                         return
 
                     # Empty content - this is an error
@@ -625,6 +816,8 @@ class LLMAgent:
                     yield f"Exception caught during iteration {iteration + 1}: {e}\n"
                     yield f"[/THINKING]\n"
                 yield f"Error: {str(e)}"
+                if answer_open and self.display_thinking:
+                    yield f"\n[/AI RESPONSE]\n"
                 return
 
         # Max iterations reached
@@ -635,6 +828,80 @@ class LLMAgent:
             yield f"Executed tools: {list(executed_tools.keys())}\n"
             yield f"[/THINKING]\n"
         yield "I've gathered information but need to simplify. Please ask a more specific question."
+        if answer_open and self.display_thinking:
+            yield f"\n[/AI RESPONSE]\n"
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared async client, created on first use inside the server's event loop"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                # no pool timeout: a chat waits for a free connection instead of failing
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout, pool=None),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={"Content-Type": "application/json"}
+            )
+        return self._http_client
+
+    async def aclose(self):
+        """Close the shared connections, call on server shutdown"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        self.session.close()
+        self.tool_pool.shutdown(wait=False)
+
+    async def stream_response(self, messages: List[Dict[str, Any]],
+                              schema: Optional[Dict[str, Any]] = None,
+                              use_tools: bool = False):
+        '''
+        Make a streaming API call to the LLM and yield Ollama's NDJSON chunks as they arrive.
+
+        Args:
+            messages (List[Dict[str, Any]]): Conversation messages
+            schema (Optional[Dict[str, Any]]): forces JSON schema for response
+            use_tools (bool): send the tool definitions with the request
+        Yields:
+            Dict[str, Any]: chunk with a partial "message" (content and/or tool_calls), the last one has done=True
+        '''
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "stream": True,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "frequency_penalty": self.frequency_penalty
+        }
+
+        if use_tools:
+            payload["tools"] = self.tool_definitions
+
+        if schema:
+            payload["format"] = schema
+
+        try:
+            async with self.http_client.stream("POST", self.model_url, json=payload) as response:
+
+                if response.status_code >= 400:
+                    raise Exception(f"Request failed with status code {response.status_code}")
+
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(f"LLM error: {chunk['error']}")
+                    yield chunk
+                    if chunk.get("done"):
+                        return
+
+        except httpx.ConnectError:
+            raise ConnectionError("Failed to connect to the LLM API")
+        except httpx.TimeoutException:
+            raise TimeoutError("Request to LLM API timed out")
+        except httpx.TransportError as e:
+            raise ConnectionError(f"Connection to the LLM API failed ({type(e).__name__})")
 
     def generate_response(self, messages: List[Dict[str, Any]], 
                                 schema: Optional[Dict[str, Any]] = None,
@@ -666,10 +933,11 @@ class LLMAgent:
             payload["format"] = schema
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.model_url,
                 headers={"Content-Type": "application/json"},
-                json=payload
+                json=payload,
+                timeout=(self.connect_timeout, self.read_timeout)
             )
 
             if not response.ok:
@@ -687,7 +955,89 @@ class LLMAgent:
             raise Exception("An unexpected error occurred")
 
 
-    def next_semester(self, transcript: Dict[str, Any], needed_credits: int, max_loop: int = 5) -> Dict[str, Any]:
+    async def sample_recommendations(self, messages: List[Dict[str, Any]], schema: Dict[str, Any],
+                                     samples: int, check, seed: int = 0):
+        '''
+        Ask the LLM for several recommendations at once, each with its own seed and temperature,
+        at most `recommend_concurrency` requests at a time across every chat of the agent.
+        Temperatures go up by `sample_temperature_step` per sample, up to `MAX_SAMPLE_TEMPERATURE`
+        (or the agent temperature if it is higher). Answers are checked as they arrive,
+        the first valid one is returned and the requests still running are cancelled.
+
+        Args:
+            messages (List[Dict[str, Any]]): Conversation messages
+            schema (Dict[str, Any]): JSON schema of the answer
+            samples (int): number of recommendations to ask for
+            check: assistant message -> (recommendation, error reason), an empty reason is valid
+            seed (int): seed of the first sample, the others count up from it
+        Returns:
+            (recommendation, assistant message, error reason) of the first valid answer, or of the
+            first answer that parsed when none is valid
+        '''
+        first = None
+        failed = None
+
+        # the shared client belongs to the server's event loop, next_semester runs in its own
+        async with httpx.AsyncClient(timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                                     headers={"Content-Type": "application/json"}) as client:
+
+            async def sample(i):
+                temperature = min(self.temperature + i * self.sample_temperature_step,
+                                  max(self.temperature, MAX_SAMPLE_TEMPERATURE))
+                payload = {
+                    "model": self.model_name,
+                    "messages": messages,
+                    "stream": False,
+                    "temperature": temperature,
+                    "top_p": self.top_p,
+                    "frequency_penalty": self.frequency_penalty,
+                    # Ollama reads the sampling parameters from options
+                    "options": {"temperature": temperature, "top_p": self.top_p, "seed": seed + i},
+                    "format": schema
+                }
+                # polled instead of waited on in a thread, so a cancelled sample never takes a slot
+                while not self._recommend_limit.acquire(blocking=False):
+                    await asyncio.sleep(0.05)
+                try:
+                    response = await client.post(self.model_url, json=payload)
+                finally:
+                    self._recommend_limit.release()
+                if response.status_code >= 400:
+                    raise Exception(f"Request failed with status code {response.status_code}")
+                return response.json()['message']['content']
+
+            tasks = [asyncio.create_task(sample(i)) for i in range(samples)]
+            try:
+                for answer in asyncio.as_completed(tasks):
+                    try:
+                        assistant_msg = await answer
+                    except Exception as e:
+                        failed = failed or e
+                        continue
+
+                    print("Assistant recommendation:", assistant_msg)
+                    out, error_reason = check(assistant_msg)
+                    if not error_reason:
+                        return out, assistant_msg, error_reason
+                    # an answer that parsed makes a better correction prompt than one that did not
+                    if first is None or (first[0] is None and out is not None):
+                        first = (out, assistant_msg, error_reason)
+            finally:
+                # closing the connections makes Ollama stop generating the answers nobody waits for
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        if first is None:
+            if isinstance(failed, httpx.ConnectError):
+                raise ConnectionError("Failed to connect to the LLM API")
+            if isinstance(failed, httpx.TimeoutException):
+                raise TimeoutError("Request to LLM API timed out")
+            raise Exception(f"Every recommendation request failed ({failed})")
+        return first
+
+    def next_semester(self, transcript: Dict[str, Any], needed_credits: int, max_loop: int = 5,
+                      samples: Optional[int] = None) -> Dict[str, Any]:
         '''
         Generate a response for the next semester.
 
@@ -695,27 +1045,84 @@ class LLMAgent:
             transcript (Dict[str, Any]): Student's full transcript data
             needed_credits (int): Number of credits needed for the next semester
             max_loop (int): Maximum number of times to loop through the process
+            samples (Optional[int]): recommendations asked for at once in each loop, defaults to
+                `recommend_samples` (see `sample_recommendations`)
         Returns:
-            Dict[str, Any]: Next semester data
+            Dict[str, Any]: Next semester data, with the plan it comes from when `use_planner` is set
         '''
         credits_left = 120 - transcript['earned_credits'] 
 
         if needed_credits > credits_left:
             return f"You requested {needed_credits} credits, but you have only {credits_left} credits left to complete your degree."
 
+        # the planner counts in-progress courses as taken, the validation does not, so its first
+        # term is only used when the validation accepts it, otherwise the LLM picks the courses
+        if self.use_planner:
+            try:
+                plan = self.tools.plan_semesters(transcript, needed_credits)
+            except Exception as e:
+                print(f"Semester planner failed, falling back to the LLM: {e}")
+                plan = None
+            if plan and plan.terms and plan.terms[0].courses:
+                term = plan.terms[0]
+                # the credits are checked against the degree courses the planner placed, the
+                # free elective credits of the term are not courses the validation can count
+                valid, reason = self.tools.validate_courses(transcript, term.courses,
+                                                            min(needed_credits, term.credits + 3))
+                if valid:
+                    return {"courses": term.courses,
+                            "free_credits": term.free_credits,
+                            "plan": plan}
+                print(f"Planned term rejected, falling back to the LLM: {reason}")
+
+        # degree courses the validation accepts, plus free electives when they fall short, the
+        # model picks from these instead of guessing
+        candidates = self.tools.next_semester_candidates(transcript, needed_credits)
+        if sum(candidates.values()) < needed_credits - 3:
+            # even the free electives do not add up, no recommendation could pass the validation
+            return (f"Only {sum(candidates.values()):g} credits of courses can be taken next semester "
+                    f"with the completed courses, {needed_credits} credits were requested.")
+
         # Initialize conversation with system message
         context = self.tools.transcript2context(transcript)
 
+        eligible = "[ELIGIBLE COURSES FOR NEXT SEMESTER]\n"
+        for code, credits in candidates.items():
+            eligible += f"- {code} - {self.tools.catalog.get(code)['CourseTitle']} ({credits:g} credits)\n"
+
         messages = [
             {"role": "system", "content": INSTRUCTION_PROMPT},
             {"role": "system", "content": context},
+            {"role": "system", "content": eligible},
         ]
 
         recommend_prompt = ("What courses do you recommend for the next semester? " +
-                            "Place your recommendation between <recommendation> tags. ex. some text ... <recommendation> ONLY YOUR LIST OF RECOMMENDED COURSES </recommendation> ... some text")
+                            f"Only pick courses from [ELIGIBLE COURSES FOR NEXT SEMESTER], their credits must add up to {needed_credits - 3} to {needed_credits}.")
+
+        # the model can only answer with course codes from the candidates
+        schema = course_recommend_schema(candidates)
+
+        samples = samples or self.recommend_samples
+
+        def check(assistant_msg):
+            try:
+                out = {"courses": list(dict.fromkeys(json.loads(assistant_msg)['courses']))}
+            except (ValueError, KeyError, TypeError) as e:
+                return None, f"Invalid response from LLM: {e}"
+
+            if len(out['courses']) == 0:
+                return out, "No courses recommended"
+
+            valid, reason = self.tools.validate_courses(transcript, out['courses'], needed_credits)
+            if valid:
+                return out, ""
+
+            return out, (f"\nYou Recommended: {out['courses']}\n" +
+                         f"Error: {reason}\n" +
+                         "Create a new list of recommended courses based on the error\n\n")
 
         error_reason = ""
-        for _ in range(max_loop):
+        for loop in range(max_loop):
             
             if error_reason:
                 print(error_reason)
@@ -723,28 +1130,20 @@ class LLMAgent:
             else:
                 messages.append({"role": "user", "content": recommend_prompt})
 
-            out = self.generate_response(messages)
-            assistant_msg = out['message']['content']
+            if samples > 1:
+                # runs in a tool pool thread, so the samples get an event loop of their own
+                out, assistant_msg, error_reason = asyncio.run(
+                    self.sample_recommendations(messages, schema, samples, check, seed=loop * samples))
+            else:
+                assistant_msg = self.generate_response(messages, schema=schema)['message']['content']
+                print("Assistant recommendation:", assistant_msg)
+                out, error_reason = check(assistant_msg)
 
-            print("Assistant recommendation:", assistant_msg)
+            if not error_reason:
+                return out
 
-            try:
-                out = self.tools.extract_recommendation_from_llm(assistant_msg)
+            # only answers that parsed go back to the model, as in a normal conversation
+            if out is not None:
                 messages.append({"role": "assistant", "content": assistant_msg})
-            except Exception as e:
-                error_reason = f"Invalid response from LLM: {e}"
-                continue
-     
-            if len(out['courses']) == 0:
-                error_reason = "No courses recommended"
-                continue
-            
-            valid, reason = self.tools.validate_courses(transcript, out['courses'], needed_credits)
-            if valid:
-                return out
-            
-            error_reason = (f"\nYou Recommended: {out['courses']}\n" +
-                            f"Error: {reason}\n" +
-                            "Create a new list of recommended courses based on the error\n\n")
         
         return "Agent exceeded max loop count with invalid recommendations"
@@ -0,0 +1,364 @@
+"""
+Semester Planner
+
+Deterministic semester-by-semester plan to graduation, built from the degree audit
+(`parse_degree_requirements_from_transcript`) and the prerequisite graph. A course is only
+placed in a term once the courses of the earlier terms meet its prerequisites, and no term
+goes over the credit cap, so every term of a plan is valid without asking the LLM.
+"""
+
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from core.helpers import get_completed_courses
+
+TERM_PATTERN = re.compile(r"(Fall|Spring|Summer|Winter)\s+(\d{4})")
+
+# terms planned at most, a plan that needs more is cut off and marked incomplete
+MAX_TERMS = 16
+
+
+def course_credits(credits) -> float:
+    """Credits of a catalog course as added up by `AdvisorTools.validate_courses`: "3" -> 3.0, "1 to 3" -> 3.0, None -> 0.0."""
+    if not credits:
+        return 0.0
+    try:
+        return float(re.split(r"(?i)\s*to\s*", str(credits))[-1])
+    except ValueError:
+        return 0.0
+
+
+def next_term(term: str) -> str:
+    """Planned term after a term, only fall and spring are planned: "Fall 2024" -> "Spring 2025", "Summer 2024" -> "Fall 2024"."""
+    match = TERM_PATTERN.search(term or "")
+    if not match:
+        raise ValueError(f"Unknown term format: {term}")
+    season, year = match.group(1), int(match.group(2))
+    if season == "Fall":
+        return f"Spring {year + 1}"
+    return f"Spring {year}" if season == "Winter" else f"Fall {year}"
+
+
+def upcoming_term(today: Optional[date] = None) -> str:
+    """First term that has not started yet, only fall and spring are planned: March 2025 -> "Fall 2025", October 2025 -> "Spring 2026"."""
+    today = today or date.today()
+    return f"Fall {today.year}" if today.month < 8 else f"Spring {today.year + 1}"
+
+
+def term_key(term: str) -> Tuple[int, int]:
+    # sorts terms in calendar order, "Winter 2024" comes before "Spring 2024"
+    match = TERM_PATTERN.search(term)
+    return int(match.group(2)), ("Winter", "Spring", "Summer", "Fall").index(match.group(1))
+
+
+def last_term(transcript: Dict[str, Any]) -> Optional[str]:
+    """Latest term on a transcript, None if it has no terms."""
+    terms = [term['term'] for key in ("completed", "inprogress")
+             for term in transcript.get(key) or [] if TERM_PATTERN.search(term.get('term', ''))]
+    return max(terms, key=term_key) if terms else None
+
+
+class PlannedTerm:
+    """
+    One term of a plan.
+
+    Attributes
+    ----------
+    term : str
+        term name ("Spring 2025")
+    courses : list[str]
+        course codes taken in the term, prerequisites first
+    credits : float
+        credits of `courses`
+    free_credits : float
+        credits left for free electives, only planned when the degree courses do not add up
+        to the credits the degree needs
+    """
+    def __init__(self, term: str):
+        self.term = term
+        self.courses: List[str] = []
+        self.credits = 0.0
+        self.free_credits = 0.0
+
+    @property
+    def total_credits(self) -> float:
+        return self.credits + self.free_credits
+
+
+class DegreePlan:
+    """
+    Semester-by-semester plan of a student.
+
+    Attributes
+    ----------
+    terms : list[PlannedTerm]
+        planned terms in order, the first one is the next semester
+    start_term : str
+        first planned term
+    max_credits : float
+        credit cap of every term
+    credits_left : float
+        credits the student still needs for the degree when the plan starts
+    unplanned : dict
+        course code -> why it could not be placed (missing from the catalog, prerequisites
+        that can not be met, more credits than the cap)
+    complete : bool
+        every requirement and every credit is placed within `MAX_TERMS`
+    """
+    def __init__(self, start_term: str, max_credits: float, credits_left: float):
+        self.start_term = start_term
+        self.terms: List[PlannedTerm] = []
+        self.max_credits = max_credits
+        self.credits_left = credits_left
+        self.unplanned: Dict[str, str] = {}
+        self.complete = False
+
+    @property
+    def graduation_term(self) -> Optional[str]:
+        """Last planned term, None when the plan is incomplete."""
+        if not self.complete:
+            return None
+        return self.terms[-1].term if self.terms else None
+
+    def courses(self) -> List[str]:
+        return [code for term in self.terms for code in term.courses]
+
+
+class SemesterPlanner:
+    """
+    Places the courses a student still needs into terms under a credit cap.
+
+    The required courses of the audit, one course of each open "or" block, enough
+    electives for each restricted section and the prerequisites of all of them (the
+    cheapest by credits, see `PreqTester.courses_to_satisfy`) make up the courses to
+    plan. Each term then takes the courses whose prerequisites are met, longest chain of
+    planned courses after it first (list scheduling on the critical path), so the courses
+    that hold up the most terms are never left for later.
+
+    Attributes
+    ----------
+    tester : PreqTester
+        prerequisite expressions, credits and catalog records
+    graph : PrerequisiteGraph
+        dependents of each course, used to rank courses by the chain they hold up
+    """
+    def __init__(self, tester):
+        self.tester = tester
+
+    @property
+    def graph(self):
+        # built on first use by the tester, creating a planner stays cheap
+        return self.tester.graph
+
+    def credits(self, code: str) -> float:
+        record = self.tester.catalog.get(code)
+        return course_credits(record['Credits']) if record else 0.0
+
+    def plan(self, transcript: Dict[str, Any], degree_progress: Dict[str, Dict[str, Any]],
+             max_credits: float = 15, total_credits: Optional[float] = None,
+             start_term: Optional[str] = None) -> DegreePlan:
+        """
+        Plan the remaining terms of a student.
+
+        Args:
+            transcript: Student transcript dictionary
+            degree_progress: degree filename -> parse_degree_requirements_from_transcript output
+            max_credits: credit cap of each term
+            total_credits: credits the degree needs, free elective credits are planned up to it
+            start_term: first planned term, defaults to the term after the last one on the transcript,
+                or the upcoming term for a transcript without terms
+
+        Returns:
+            DegreePlan, courses in each term only need courses of earlier terms (or the transcript)
+        """
+        taken = self._taken(transcript)
+        inprogress_credits = sum(float(course.get('credits') or 0)
+                                 for term in transcript.get('inprogress') or [] for course in term['courses'])
+        credits_left = max(0.0, (total_credits or 0) - float(transcript.get('earned_credits') or 0) - inprogress_credits)
+        if start_term is None:
+            latest = last_term(transcript)
+            start_term = next_term(latest) if latest else upcoming_term()
+        plan = DegreePlan(start_term, max_credits, credits_left)
+
+        targets = self._targets(degree_progress, taken, plan.unplanned)
+        planned = self._with_prerequisites(targets, taken, plan.unplanned)
+        for code in list(planned):
+            if planned[code] > max_credits:
+                plan.unplanned[code] = f"{planned[code]:g} credits, more than {max_credits:g} per term"
+                del planned[code]
+
+        self._schedule(plan, planned, taken)
+        self._add_free_credits(plan)
+        return plan
+
+    def _taken(self, transcript: Dict[str, Any]) -> set:
+        # passed and in-progress courses, the in-progress ones are done before the plan starts
+        taken = set(get_completed_courses(transcript)) if 'completed' in transcript else set()
+        for term in transcript.get('inprogress') or []:
+            for course in term['courses']:
+                taken.add(f"{course['subject']} {course['course_number']}")
+        return taken
+
+    def _targets(self, degree_progress, taken: set, unplanned: Dict[str, str]) -> List[str]:
+        # courses the degree requires, in audit order
+        targets: Dict[str, None] = {}
+        for progress in degree_progress.values():
+            for section in progress.values():
+                if section['completed']:
+                    continue
+                groups = section.get('groups') or [("and", list(section['not_completed']))]
+                low, high = section['total_credits']
+                # in-progress courses of the section already count toward its credits
+                listed = [code for _, codes in groups for code in codes]
+                done = section['completed_credits'] + sum(self.credits(code) for code in listed if code in taken)
+
+                # one course of each open "or" block
+                for block_type, codes in groups:
+                    if block_type != "or" or not codes or any(code in taken for code in codes):
+                        continue
+                    picked = self._cheapest(codes, None, taken, targets)
+                    if not picked:
+                        unplanned[" or ".join(codes)] = "no option can be taken from the catalog"
+                    for code in picked:
+                        targets[code] = None
+                        done += self.credits(code)
+
+                options = [code for block_type, codes in groups if block_type == "and"
+                           for code in codes if code not in taken]
+                for code in options:
+                    if code not in self.tester.prereqs:
+                        unplanned[code] = "not found in catalog"
+                options = [code for code in options if code in self.tester.prereqs]
+
+                # electives, and lists with more credits than the section ("choose from"), only
+                # need enough courses for the section credits
+                if section.get('restricted') or sum(self.credits(code) for code in options) > high - done:
+                    options = self._cheapest(options, low - done, taken, targets)
+                for code in options:
+                    targets[code] = None
+        return list(targets)
+
+    def _cheapest(self, options: Iterable[str], needed: Optional[float], taken: set, chosen) -> List[str]:
+        # options ranked by the credits of the prerequisites they still need, fixed credit
+        # counts before ranges; needed=None picks one option, otherwise enough for the credits
+        ranked = []
+        assumed = taken | set(chosen)
+        for code in options:
+            if code in assumed or code not in self.tester.prereqs or code not in self.tester.credits:
+                continue
+            path = self._path(code, assumed)
+            if path is None:
+                continue
+            extra = sum(self.tester.credits.get(c, 0) for c in path if c != code)
+            variable = "to" in str(self.tester.catalog.get(code)['Credits'] or "")
+            ranked.append((extra, variable, self.graph.chain_depth(code), code))
+        ranked.sort()
+
+        picked, credits = [], 0.0
+        for _, _, _, code in ranked:
+            if needed is None:
+                return [code]
+            if credits >= needed:
+                break
+            picked.append(code)
+            credits += self.credits(code)
+        return picked
+
+    def _path(self, code: str, assumed) -> Optional[List[str]]:
+        # courses to take for `code` (itself last), None if a prerequisite is missing from the catalog
+        if self.tester(code, assumed):
+            return [code]
+        path = self.tester.courses_to_satisfy(code, assumed, by_credits=True, transitive=True)
+        if not path or any(c not in self.tester.credits for c in path):
+            return None
+        return path + [code]
+
+    def _with_prerequisites(self, targets: List[str], taken: set, unplanned: Dict[str, str]) -> Dict[str, float]:
+        # targets plus the prerequisites they still need, course code -> credits
+        planned: Dict[str, float] = {}
+        for code in targets:
+            path = self._path(code, taken | set(planned))
+            if path is None:
+                unplanned[code] = "prerequisites can not be met from the catalog"
+                continue
+            for crse in path:
+                if crse not in planned and crse not in taken:
+                    planned[crse] = self.credits(crse)
+        return planned
+
+    def _chains(self, planned: Dict[str, float]) -> Dict[str, int]:
+        # planned courses -> length of the longest chain of planned courses that starts with it
+        nodes = {self.graph.index[code]: code for code in planned if code in self.graph}
+        members = self.graph.mask(nodes.values())
+        chains: Dict[int, int] = {}
+
+        for start in nodes:
+            # iterative post-order over the planned dependents, courses in a cycle count once
+            stack = [(start, False)]
+            visiting = set()
+            while stack:
+                node, expanded = stack.pop()
+                if node in chains:
+                    continue
+                after = list(self.graph.nodes(self.graph.dependents[node] & members))
+                if expanded:
+                    visiting.discard(node)
+                    chains[node] = 1 + max((chains.get(dep, 0) for dep in after if dep != node), default=0)
+                    continue
+                visiting.add(node)
+                stack.append((node, True))
+                stack.extend((dep, False) for dep in after if dep not in chains and dep not in visiting)
+        return {code: chains.get(node, 1) for node, code in nodes.items()}
+
+    def _schedule(self, plan: DegreePlan, planned: Dict[str, float], taken: set):
+        term = plan.start_term
+        chains = self._chains(planned)
+        # longest chain first, then the larger course, then the code so plans are reproducible
+        remaining = sorted(planned, key=lambda code: (-chains.get(code, 1), -planned[code], code))
+        done = self.tester.to_mask(taken)
+
+        while remaining and len(plan.terms) < MAX_TERMS:
+            planned_term = PlannedTerm(term)
+            for code in remaining:
+                if planned_term.credits + planned[code] > plan.max_credits:
+                    continue
+                # prerequisites are checked against earlier terms only, never the same term
+                if self.tester(code, done):
+                    planned_term.courses.append(code)
+                    planned_term.credits += planned[code]
+
+            if not planned_term.courses:
+                for code in remaining:
+                    plan.unplanned[code] = "prerequisites can not be met by the planned courses"
+                remaining = []
+                break
+
+            for code in planned_term.courses:
+                done |= self.tester.course_bits.get(code, 0)
+            remaining = [code for code in remaining if code not in planned_term.courses]
+            planned_term.courses = self.graph.courses(self.graph.mask(planned_term.courses))
+            plan.terms.append(planned_term)
+            term = next_term(term)
+
+        for code in remaining:
+            plan.unplanned[code] = f"does not fit in {MAX_TERMS} terms"
+
+    def _add_free_credits(self, plan: DegreePlan):
+        # free elective credits go into the spare room of the earliest terms, then into new terms
+        free = plan.credits_left - sum(term.credits for term in plan.terms)
+        for planned_term in plan.terms:
+            if free <= 0:
+                break
+            room = min(free, plan.max_credits - planned_term.credits)
+            planned_term.free_credits = room
+            free -= room
+
+        term = next_term(plan.terms[-1].term) if plan.terms else plan.start_term
+        while free > 0 and len(plan.terms) < MAX_TERMS:
+            planned_term = PlannedTerm(term)
+            planned_term.free_credits = min(free, plan.max_credits)
+            free -= planned_term.free_credits
+            plan.terms.append(planned_term)
+            term = next_term(term)
+
+        plan.complete = free <= 0 and not plan.unplanned
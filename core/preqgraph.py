@@ -0,0 +1,263 @@
+"""
+Prerequisite Graph
+
+Course dependency graph over every parsed prerequisite expression of a PreqTester, built
+once per process (`PreqTester.graph`). Transitive prerequisites, dependents and chain
+depths are precomputed as bitsets, so "everything required before X" is a lookup instead
+of a chain of per-course prerequisite checks, and "what does completing X unlock" only
+re-evaluates the expressions that mention X.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class PrerequisiteGraph:
+    """
+    Directed graph course -> its prerequisites, with transitive closures as int bitsets
+    (bit i is the course `codes[i]`, see `mask` and `courses`).
+
+    An "or" in an expression is a choice, so two closures are kept: `ancestors` holds every
+    course on any way to meet the prerequisites, `required` only the courses every way
+    goes through.
+
+    Attributes
+    ----------
+    codes : list[str]
+        course code of each node, catalog courses first, then prerequisites missing from the catalog
+    index : dict
+        course code -> node
+    prerequisites : list[int]
+        direct prerequisites of each node (any alternative)
+    ancestors : list[int]
+        every course in the prerequisite chain of each node (any alternative)
+    required : list[int]
+        courses in the chain of each node that can not be avoided by picking another alternative
+    dependents : list[int]
+        courses whose prerequisite expression mentions the node (reverse of `prerequisites`)
+    descendants : list[int]
+        courses that have the node in their chain (reverse of `ancestors`)
+    depth : list[int]
+        fewest semesters of prerequisites before the course can be taken, 0 if it has none
+    cycles : list[list[str]]
+        groups of courses that require each other. Inside a group the prerequisites are
+        not followed, so `required` and `depth` treat them as taken in the same semester
+    tester : PreqTester
+        evaluates the expressions, see `unlocks`
+    """
+    def __init__(self, tester):
+        self.tester = tester
+        self.codes: List[str] = list(tester.prereqs)
+        self.codes += [code for code in tester.course_bits if code not in tester.prereqs]
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(self.codes)}
+
+        # PreqTester bit -> node, the compiled expressions are in PreqTester bits
+        self._nodes = {bit: self.index[code] for code, bit in tester.course_bits.items()}
+
+        self.expressions = [None] * len(self.codes)
+        for code, parsed in tester.prereqs.items():
+            # expressions that could not be parsed do not block a course (see PreqTester), so they add no edges
+            if parsed and parsed['valid']:
+                self.expressions[self.index[code]] = parsed['compiled']
+
+        self.prerequisites = [self._direct(expr) if expr else 0 for expr in self.expressions]
+
+        n = len(self.codes)
+        self.ancestors = [0] * n
+        self.required = [0] * n
+        self.dependents = [0] * n
+        self.descendants = [0] * n
+        self.depth = [0] * n
+        self.cycles: List[List[str]] = []
+
+        # components come prerequisites first, so every closure below only reads finished nodes
+        for component in self._components():
+            self._close(component)
+
+        for node in range(n):
+            bit = 1 << node
+            for prerequisite in self._bits(self.prerequisites[node]):
+                self.dependents[prerequisite] |= bit
+            for ancestor in self._bits(self.ancestors[node]):
+                self.descendants[ancestor] |= bit
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.index
+
+    def node(self, code: str) -> int:
+        if code not in self.index:
+            raise ValueError(f"Course {code} not found in prerequisite graph")
+        return self.index[code]
+
+    def mask(self, codes: Iterable[str]) -> int:
+        """Bitset of course codes, codes not in the graph are ignored."""
+        mask = 0
+        for code in codes:
+            node = self.index.get(code)
+            if node is not None:
+                mask |= 1 << node
+        return mask
+
+    def nodes(self, mask: int) -> Iterator[int]:
+        """Nodes of a bitset (indices into `codes`, lowest first), not PreqTester bits."""
+        return self._bits(mask)
+
+    def courses(self, mask: int) -> List[str]:
+        """Course codes of a bitset, prerequisites first (by depth, then code)."""
+        nodes = sorted(self._bits(mask), key=lambda node: (self.depth[node], self.codes[node]))
+        return [self.codes[node] for node in nodes]
+
+    def required_before(self, code: str, all_alternatives: bool = False) -> int:
+        """
+        Every course that has to be taken before a course, as a bitset.
+
+        Args:
+            code: course code ("CS 04222")
+            all_alternatives: include the courses of every alternative of an "or",
+                not only the ones every way goes through
+        """
+        node = self.node(code)
+        return self.ancestors[node] if all_alternatives else self.required[node]
+
+    def chain_depth(self, code: str) -> int:
+        """Fewest semesters of prerequisites before a course can be taken."""
+        return self.depth[self.node(code)]
+
+    def is_prerequisite(self, prerequisite: str, code: str) -> bool:
+        """True if `prerequisite` is anywhere in the prerequisite chain of `code`."""
+        node = self.index.get(prerequisite)
+        return node is not None and bool(self.ancestors[self.node(code)] >> node & 1)
+
+    def unlocks(self, course: str, taken) -> Tuple[List[str], List[str]]:
+        """
+        What completing a course changes for a student. Only the courses whose prerequisites
+        mention it are evaluated again, every other course keeps its eligibility.
+
+        Args:
+            course: course code of the newly completed course
+            taken (list[str] | set[str]): completed course codes
+
+        Returns:
+            (courses that become takeable, courses that mention it but still miss other prerequisites),
+            prerequisites first. Courses already taken or already takeable are left out.
+        """
+        node = self.node(course)
+        taken = set(taken)
+        before = self.tester.to_mask(taken)
+        after = before | self.tester.course_bits.get(course, 0)
+
+        unlocked, blocked = [], []
+        for dependent in self.courses(self.dependents[node]):
+            if dependent == course or dependent in taken:
+                continue
+            expr = self.expressions[self.index[dependent]]
+            if self.tester._evaluate(expr, before):
+                continue
+            (unlocked if self.tester._evaluate(expr, after) else blocked).append(dependent)
+        return unlocked, blocked
+
+    def _direct(self, expr) -> int:
+        _, mask, children = expr
+        direct = 0
+        for bit in self._bits(mask):
+            direct |= 1 << self._nodes[1 << bit]
+        for child in children:
+            direct |= self._direct(child)
+        return direct
+
+    def _components(self) -> List[List[int]]:
+        # strongly connected components (iterative Tarjan), each one after the components it depends on
+        n = len(self.codes)
+        order = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack, components = [], []
+        counter = 0
+
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            work = [(root, self._bits(self.prerequisites[root]))]
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                node, edges = work[-1]
+                for nxt in edges:
+                    if order[nxt] == -1:
+                        order[nxt] = low[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = True
+                        work.append((nxt, self._bits(self.prerequisites[nxt])))
+                        break
+                    if on_stack[nxt]:
+                        low[node] = min(low[node], order[nxt])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == order[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+
+        return components
+
+    def _close(self, component: List[int]):
+        members = 0
+        for node in component:
+            members |= 1 << node
+
+        if len(component) > 1 or self.prerequisites[component[0]] & members:
+            self.cycles.append(sorted(self.codes[node] for node in component))
+
+        ancestors = 0
+        for node in component:
+            direct = self.prerequisites[node]
+            ancestors |= direct
+            for prerequisite in self._bits(direct & ~members):
+                ancestors |= self.ancestors[prerequisite]
+
+        for node in component:
+            self.ancestors[node] = ancestors
+            if self.expressions[node]:
+                self.required[node], self.depth[node] = self._evaluate(self.expressions[node], members)
+
+    def _evaluate(self, expr, members: int) -> Tuple[int, int]:
+        # (required bitset, semesters) of an expression: "and" needs every operand, so it takes
+        # the union and the longest chain, "or" needs one, so it takes the intersection and the shortest
+        op, mask, children = expr
+        operands = [self._leaf(self._nodes[1 << bit], members) for bit in self._bits(mask)]
+        operands += [self._evaluate(child, members) for child in children]
+
+        required, depth = operands[0]
+        for other_required, other_depth in operands[1:]:
+            if op == "and":
+                required |= other_required
+                depth = max(depth, other_depth)
+            else:
+                required &= other_required
+                depth = min(depth, other_depth)
+        return required, depth
+
+    def _leaf(self, node: int, members: int) -> Tuple[int, int]:
+        # a course in the same cycle is not followed, see `cycles`
+        if members >> node & 1:
+            return 1 << node, 1
+        return (1 << node) | self.required[node], self.depth[node] + 1
+
+    @staticmethod
+    def _bits(mask: int):
+        # yields the index of each bit set in mask
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
@@ -1,41 +1,127 @@
 import re
-import pandas as pd
+import os
+import pickle
+import hashlib
 import itertools
-from tqdm import tqdm
+from functools import cached_property
 
-# TODO: implement caching or initial parsing of all courses
 # TODO: fix expression issues with "or or", mismatching parentheses, etc. 
 
+# tokens allowed in a prerequisite expression, anything else makes the expression invalid
+TOKEN_PATTERN = re.compile(r"\s*(?:(?P<course>[A-Z]{2,4}\s*\d{4,5})|(?P<op>\b(?:and|or)\b)|(?P<paren>[()]))")
+
+# bump when the parsed/compiled format changes, old cache files are then rebuilt
+CACHE_VERSION = 1
+
 class PreqTester():
     """
     Tests if a course can be taken given the courses taken
+
+    The parsed prerequisites are cached in a pickle next to courses.json (`cache_path`),
+    keyed by the sha256 of courses.json. The cache is only rebuilt when courses.json changes,
+    or by running this file: `python core/preqtester.py [courses.json]`
     
     Attributes
     ----------
-    courses : pandas.DataFrame
-        DataFrame containing course information
+    catalog : CourseCatalog
+        shared course catalog, loaded on first use
     prereqs : dict
         dictionary of all the parsed preq for all courses,
         contains "missing" key for preq courses not found in the catalog.
+    course_bits : dict
+        course code -> single bit (int) used by the compiled expressions,
+        a set of taken courses becomes one int mask (see `to_mask`)
+    bit_courses : dict
+        reverse of course_bits
+    credits : dict
+        course code -> lowest credit count of the course
+    graph : PrerequisiteGraph
+        dependency graph over all the parsed prerequisites, built on first use
+
+    Compiled expressions are nested tuples `(op, mask, children)`:
+        ("and", mask, children) -> every bit in mask is taken and every child is true
+        ("or", mask, children)  -> any bit in mask is taken or any child is true
     """
-    def __init__(self, courses_path):
+    def __init__(self, courses_path, cache_path=None, rebuild: bool = False):
         self.course_pattern = r"[A-Z]{2,4}\s*\d{4,5}" # catches CS2345 or CS 02345
-        self.courses = pd.read_json(courses_path)
+        self.courses_path = courses_path
+        self.cache_path = cache_path or os.path.splitext(courses_path)[0] + ".preqs.pkl"
+
+        with open(courses_path, "rb") as f:
+            source_hash = hashlib.sha256(f.read()).hexdigest()
+
+        if rebuild or not self._load_cache(source_hash):
+            self._build()
+            self._save_cache(source_hash)
+
+    @cached_property
+    def catalog(self):
+        # only needed to build the cache or look up course records, so a cache hit skips loading it
+        from core.catalog import get_catalog
+        return get_catalog(self.courses_path)
+
+    @cached_property
+    def graph(self):
+        # catalog-wide prerequisite graph, built on first use from the parsed expressions
+        from core.preqgraph import PrerequisiteGraph
+        return PrerequisiteGraph(self)
+
+    def _build(self):
+        # parses the prerequisites of every course in the catalog
+        # only runs when the cache is stale, so the progress bar is imported here
+        from tqdm import tqdm
+
         self.prereqs = {}
+        self.course_bits = {}
+        self.bit_courses = {}
 
-        assert len(self.courses['CourseCode'].values) == len(self.courses), "Duplicate course codes found"
+        # lowest credit count of each course, used as the cost in `courses_to_satisfy`
+        self.credits = {crse['CourseCode']: self._min_credits(crse['Credits']) for crse in self.catalog}
 
-        for i in tqdm(range(len(self.courses))):
-            crse = self.courses.iloc[i]
+        for crse in tqdm(self.catalog):
             self.prereqs[crse['CourseCode']] = self._parse_preq(crse)
 
-    def __call__(self, course: str, taken: list[str]):
+    def _load_cache(self, source_hash: str) -> bool:
+        # returns False if the cache is missing, unreadable, or built from another courses.json
+        try:
+            with open(self.cache_path, "rb") as f:
+                cache = pickle.load(f)
+        except Exception:
+            return False
+
+        if cache.get('version') != CACHE_VERSION or cache.get('source_hash') != source_hash:
+            return False
+
+        self.prereqs = cache['prereqs']
+        self.course_bits = cache['course_bits']
+        self.bit_courses = {bit: crse for crse, bit in self.course_bits.items()}
+        self.credits = cache['credits']
+        return True
+
+    def _save_cache(self, source_hash: str):
+        cache = {
+            'version': CACHE_VERSION,
+            'source_hash': source_hash,
+            'prereqs': self.prereqs,
+            'course_bits': self.course_bits,
+            'credits': self.credits,
+        }
+        # write to a temp file first so a crash never leaves a half written cache
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"[WARNING] Failed to save prerequisite cache to {self.cache_path}: {e}")
+
+    def __call__(self, course: str, taken):
         """
         Tests if the course can be taken given the courses taken
 
         Args:
             course (str): The course code to test
-            taken (list[str]): list of course codes
+            taken (list[str] | set[str] | int): course codes, or a mask from `to_mask`
 
         Returns:
             bool: True if the course can be taken, False otherwise
@@ -46,35 +132,132 @@ class PreqTester():
         if parsed is None:
             return True
 
-        #TODO: write a function that finds the least amount if true courses needed to satisfy the expr,
-        # and return the list of courses that need to be taken
-        return eval(parsed['py_expr'], {'taken': taken})
+        # expressions that could not be parsed can not be checked, so they do not block the course
+        if not parsed['valid']:
+            return True
+
+        return self._evaluate(parsed['compiled'], self.to_mask(taken))
+
+    def to_mask(self, taken) -> int:
+        """
+        Converts course codes into the int mask used by the compiled expressions.
+        Courses that never appear in a prerequisite are ignored, they can not change a result.
+
+        Args:
+            taken (list[str] | set[str] | int): course codes, masks are returned as is
+        """
+        if isinstance(taken, int):
+            return taken
+
+        bits = self.course_bits
+        mask = 0
+        for crse in taken:
+            bit = bits.get(crse)
+            if bit is not None:
+                mask |= bit
+        return mask
+
+    def courses_to_satisfy(self, course: str, taken, by_credits: bool = False, transitive: bool = False):
+        """
+        Finds the cheapest set of courses that satisfies the prerequisites of a course.
+        Works bottom up on the compiled and/or tree, an "and" takes the union of its
+        children and an "or" takes its cheapest child, so long "or" chains stay linear.
+        Courses missing from the catalog are only picked when there is no other option.
+
+        Args:
+            course (str): The course code to satisfy
+            taken (list[str] | set[str] | int): course codes, or a mask from `to_mask`
+            by_credits (bool): minimize the total credits instead of the number of courses
+            transitive (bool): also add the prerequisites of the picked courses (recursively),
+                every course is listed after its own prerequisites
 
-    def courses_to_satisfy(self, course: str, taken: list[str]):
+        Returns:
+            list[str]: courses to take, empty if the prerequisites are already met or can not be met
+        """
         assert course in self.prereqs, "No course found in cache"
-        parsed = self.prereqs[course]
-        if parsed is None:
-            return []
+        taken_mask = self.to_mask(taken)
+        memo = {}
+        visiting = set()
+
+        def cost(path):
+            missing = sum(1 for c in path if c not in self.credits)
+            credits = sum(self.credits.get(c, 0) for c in path)
+            return (missing, credits, len(path)) if by_credits else (missing, len(path), credits)
+
+        def union(paths):
+            return tuple(dict.fromkeys(c for path in paths for c in path))
+
+        def satisfy(crse):
+            parsed = self.prereqs.get(crse)
+            if parsed is None or not parsed['valid']:
+                return ()
+            return solve(parsed['compiled'], taken_mask)
+
+        def take(crse):
+            # courses needed to take `crse`, ending with `crse`; None when it can not be taken
+            if crse in memo:
+                return memo[crse]
+            if crse in visiting:
+                return None # prerequisite cycle
+
+            path = ()
+            if transitive:
+                visiting.add(crse)
+                path = satisfy(crse)
+                visiting.discard(crse)
+            memo[crse] = None if path is None else path + (crse,)
+            return memo[crse]
+
+        def solve(node, assumed):
+            # `assumed` holds taken courses plus the ones already picked by the enclosing "and"
+            op, mask, children = node
+            if op == "or":
+                if mask & assumed:
+                    return ()
+                paths = [take(self.bit_courses[bit]) for bit in self._bits(mask)]
+                paths += [solve(child, assumed) for child in children]
+                paths = [path for path in paths if path is not None]
+                return min(paths, key=cost) if paths else None
+
+            # required courses first, so the "or" children can reuse them
+            paths = [take(self.bit_courses[bit]) for bit in self._bits(mask & ~assumed)]
+            if None in paths:
+                return None
+            assumed |= self.to_mask(union(paths))
+
+            for child in children:
+                path = solve(child, assumed)
+                if path is None:
+                    return None
+                paths.append(path)
+                assumed |= self.to_mask(path)
+
+            return union(paths)
+
+        return list(satisfy(course) or [])
+
+    def _bits(self, mask: int):
+        # yields each single bit set in mask
+        while mask:
+            bit = mask & -mask
+            yield bit
+            mask ^= bit
+
+    @staticmethod
+    def _min_credits(credits) -> float:
+        # "3" -> 3.0, "1 to 3" -> 1.0, None -> 0.0
+        if not credits:
+            return 0.0
+        try:
+            return float(re.split(r"(?i)\s*to\s*", str(credits))[0])
+        except ValueError:
+            return 0.0
 
-        # extract all courses in boolean expression
-        courses = re.findall(self.course_pattern, parsed['expr'])
-        
-        # find taken courses and not taken courses in boolean expression
-        taken_in_expr = set(taken) & set(courses)
-        not_taken_in_expr = set(courses) - taken_in_expr
-
-        # find the least amount of courses needed to satisfy the expression
-        for x in range(1, len(not_taken_in_expr)+1):
-            for comb in itertools.combinations(not_taken_in_expr, x):
-                if eval(parsed['py_expr'], {'taken': list(taken_in_expr | set(comb))}):
-                    return list(comb)
-
-        return []
-  
-    def find_course(self, course:str):
-        if course not in set(self.courses['CourseCode']):
+    def find_course(self, course:str) -> dict:
+        crse = self.catalog.get(course)
+        if crse is None:
             raise ValueError(f"Course {course} not found in courses list")
-        return self.courses[self.courses['CourseCode'] == course].iloc[0]
+        return crse
 
     def _extract_desc(self, desc: str) -> dict:
         """
@@ -92,7 +275,7 @@ class PreqTester():
 
         return {m.group("key").strip(): m.group("value").strip() for m in re.finditer(pattern, desc)}
 
-    def _parse_preq(self, course: pd.Series):
+    def _parse_preq(self, course: dict):
         """
         Parses the prerequisites for a course
         """
@@ -110,10 +293,9 @@ class PreqTester():
             out = preqs[0].strip()
             try:
                 parsed = self._parse_expr(course['CourseCode'], out)
-                out = eval(parsed['py_expr'], {'taken': []}) # test the expression
                 return {
                     'expr': parsed['expr'],
-                    'py_expr': parsed['py_expr'],
+                    'compiled': parsed['compiled'],
                     'valid': True,
                     'not_found': None
                 }
@@ -134,7 +316,7 @@ class PreqTester():
         preqs = re.findall(self.course_pattern, sections['Prerequisite Courses'])
 
         # check if preq course exists in course catalog
-        missing = list(set(preqs) - set(self.courses['CourseCode']))
+        missing = list(set(preqs) - self.credits.keys())
 
         # pull "and, (, ), or" all logic operators
         preq_regex = self.course_pattern + "|" + r"\b(?:and|or)\b|\(|\)"
@@ -150,10 +332,9 @@ class PreqTester():
 
         try:
             parsed = self._parse_expr(course['CourseCode'], out)
-            out = eval(parsed['py_expr'], {'taken': []}) # test the expression
             return {
                 "expr": parsed['expr'],
-                'py_expr': parsed['py_expr'],
+                'compiled': parsed['compiled'],
                 "valid": True,
                 "not_found": missing if len(missing) > 0 else None,
             }
@@ -169,14 +350,97 @@ class PreqTester():
             }
 
     def _parse_expr(self, course: str, expr:str):
-        # converts the preq boolean expression into valid python code 
-        py_expr = re.sub(f"({self.course_pattern})", r"('\1' in taken)", expr).strip()
-        return {"expr": expr, "py_expr": py_expr}
+        # compiles the preq boolean expression, raises SyntaxError if it is malformed
+        return {"expr": expr, "compiled": self._compile_expr(expr)}
+
+    def _compile_expr(self, expr: str):
+        """
+        Compiles "CS 04113 and ( MATH 01130 or MATH 01131 )" into the nested
+        (op, mask, children) form. `and` binds tighter than `or`, same as python.
+        """
+        tokens = []
+        expr = expr.rstrip()
+        pos = 0
+        while pos < len(expr):
+            m = TOKEN_PATTERN.match(expr, pos)
+            if not m:
+                raise SyntaxError(f"unexpected token at {pos} in '{expr}'")
+            tokens.append(m.group(m.lastgroup))
+            pos = m.end()
+
+        if not tokens:
+            raise SyntaxError("empty expression")
+
+        pos = 0
+
+        def parse_op(op, parse_operand):
+            nonlocal pos
+            operands = [parse_operand()]
+            while pos < len(tokens) and tokens[pos] == op:
+                pos += 1
+                operands.append(parse_operand())
+            return operands[0] if len(operands) == 1 else (op, operands)
+
+        def parse_or():
+            return parse_op("or", parse_and)
+
+        def parse_and():
+            return parse_op("and", parse_atom)
+
+        def parse_atom():
+            nonlocal pos
+            if pos >= len(tokens):
+                raise SyntaxError(f"unexpected end of '{expr}'")
+            token = tokens[pos]
+            pos += 1
+            if token == "(":
+                node = parse_or()
+                if pos >= len(tokens) or tokens[pos] != ")":
+                    raise SyntaxError(f"missing ')' in '{expr}'")
+                pos += 1
+                return node
+            if token in ("and", "or", ")"):
+                raise SyntaxError(f"unexpected '{token}' in '{expr}'")
+            return token
+
+        tree = parse_or()
+        if pos != len(tokens):
+            raise SyntaxError(f"unexpected '{tokens[pos]}' in '{expr}'")
+
+        return self._fold(tree)
+
+    def _fold(self, tree):
+        # folds the parse tree into (op, mask, children), plain courses are merged into the mask
+        if isinstance(tree, str):
+            bit = self.course_bits.get(tree)
+            if bit is None:
+                bit = self.course_bits[tree] = 1 << len(self.course_bits)
+                self.bit_courses[bit] = tree
+            return ("and", bit, ())
+
+        op, operands = tree
+        mask, children = 0, []
+        for child in map(self._fold, operands):
+            child_op, child_mask, grand_children = child
+            single = not grand_children and child_mask & (child_mask - 1) == 0
+            if child_op == op or single:
+                mask |= child_mask
+                children.extend(grand_children)
+            else:
+                children.append(child)
+        return (op, mask, tuple(children))
+
+    @staticmethod
+    def _evaluate(node, mask: int) -> bool:
+        op, need, children = node
+        if op == "and":
+            return mask & need == need and all(PreqTester._evaluate(c, mask) for c in children)
+        return bool(mask & need) or any(PreqTester._evaluate(c, mask) for c in children)
 
     def _find_all_combs(self, course):
-        assert course in self.cache, f"No cache found for course {course['CourseCode']}"
+        assert course in self.prereqs, f"No cache found for course {course}"
         
-        course = self.courses[self.courses['CourseCode'] == course].iloc[0]
+        course = self.find_course(course)
 
         # preqs = ""
         if not course['Prerequisites']:
@@ -189,8 +453,16 @@ class PreqTester():
             all_combs.extend(itertools.combinations(preqs, i))      
 
         # extract only vaild combinations
-        true_combs = [all_comb for all_comb in all_combs if eval(self.cache[course['CourseCode']]['py_expr'], {"taken": all_comb})]
+        compiled = self.prereqs[course['CourseCode']]['compiled']
+        true_combs = [all_comb for all_comb in all_combs if self._evaluate(compiled, self.to_mask(all_comb))]
 
         return true_combs
-        
-        
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    # build step: rebuilds the prerequisite cache for the given (or default) courses.json
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "vault", "courses.json")
+    tester = PreqTester(path, rebuild=True)
+    print(f"Saved {len(tester.prereqs)} parsed prerequisites to {tester.cache_path}")
@@ -10,12 +10,37 @@ import os
 import re
 import json
 import traceback
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from core.preqtester import PreqTester 
+from core.catalog import get_catalog, tokenize
+from core.degrees import load_degree
+from core.cache import TTLCache
+from core.planner import SemesterPlanner, DegreePlan, course_credits
 from core.helpers import *
-from difflib import SequenceMatcher
 import core.helpers as helpers
 
+# keywords that give away the subject of a course title, used to narrow down title lookups
+SUBJECT_KEYWORDS = {
+    'MATH': ['calc', 'calculus', 'algebra', 'geometry', 'trigonometry', 'statistics', 'math'],
+    'CS': ['programming', 'computer', 'software', 'algorithm', 'data structures', 'coding'],
+    'PHYS': ['physics'],
+    'CHEM': ['chemistry', 'chem'],
+    'BIO': ['biology', 'bio'],
+    'ENG': ['english', 'literature', 'writing'],
+    'HIST': ['history'],
+    'PSYC': ['psychology', 'psych']
+}
+
+# number of students whose rendered context is kept in memory, see AdvisorTools.student_context
+CONTEXT_CACHE_SIZE = 256
+
+# tool results shared across requests and students, see AdvisorTools.tool_cache_key
+TOOL_CACHE_SIZE = 2048
+TOOL_CACHE_TTL = 600 # seconds
+
+# free elective courses next_semester_candidates adds when the degree courses fall short
+FREE_ELECTIVE_CANDIDATES = 40
+
 # TODO: ADD TOOLS FOR LLM HERE
 class AdvisorTools:
     """Collection of tools for academic advising. All tools return formatted plain text."""
@@ -33,7 +58,15 @@ class AdvisorTools:
         if not os.path.exists(self.courses_path):
             raise FileNotFoundError(f"Courses directory not found at: {self.courses_path}")
 
+        # one catalog per process, shared with the preqtester
+        self.catalog = get_catalog(self.courses_path)
         self.preqtester = PreqTester(self.courses_path)
+        self.planner = SemesterPlanner(self.preqtester)
+
+        # transcript hash -> student context
+        self.context_cache = TTLCache(CONTEXT_CACHE_SIZE)
+        # tool_cache_key() -> tool output
+        self.tool_cache = TTLCache(TOOL_CACHE_SIZE, TOOL_CACHE_TTL)
         
     
     # DATA RETRIEVAL TOOLS
@@ -173,7 +206,8 @@ class AdvisorTools:
         
         return "\n".join(output_lines)
     
-    def get_degree_data(self, transcript: Dict[str, Any], content_filter: str = "all") -> str:
+    def get_degree_data(self, transcript: Dict[str, Any], content_filter: str = "all",
+                        degree: Optional[str] = None) -> str:
         """
         Helper function to get degree data with optional content filtering.
 
@@ -213,28 +247,21 @@ class AdvisorTools:
                 output_lines = ["[DEGREE INFORMATION]"]
             
             for degree_file in degree_filenames:
-                degree_path = os.path.join(self.vault_path, degree_file)
+                degree_path = os.path.join(helpers.DEGREES_DIR, degree_file)
                 
                 if not os.path.exists(degree_path):
                     return f"Error: Degree file not found: {degree_file}"
                 
-                # Use existing helper function
-                degree_content = helpers.parse_degree_requirements(degree_path)
+                # parsed once per degree file and cached
+                degree_data = load_degree(degree_path)
+                degree_content = degree_data.text
                 
-                # Get degree name
-                with open(degree_path, 'r', encoding='utf-8') as f:
-                    degree_data = json.load(f)
-                degree_name = degree_data.get("name", "Unknown Degree")
-                
-                output_lines.append(f"\n[{degree_name.upper()}]")
+                output_lines.append(f"\n[{degree_data.name.upper()}]")
                 
                 # Filter content based on request
                 if content_filter == "description":
-                    lines = degree_content.split('\n')
-                    for line in lines:
-                        if line.startswith('Description:'):
-                            output_lines.append(line)
-                            break
+                    if degree_data.description:
+                        output_lines.append(f"Description: {degree_data.description}")
                     else:
                         output_lines.append("No description found")
                 elif content_filter == "courses":
@@ -317,7 +344,7 @@ class AdvisorTools:
             if crse in completed:
                 return False, f"course ({crse}) already completed"
 
-            if crse not in set(self.preqtester.courses['CourseCode']):
+            if crse not in self.catalog:
                 return False, f"course ({crse}) not found in catalog"
 
             crse = self.preqtester.find_course(crse)
@@ -333,6 +360,10 @@ class AdvisorTools:
 
                 # find courses that will satisfy the preq
                 for x in self.preqtester.courses_to_satisfy(_c, list(completed.keys())):
+                    # only picked when the prerequisite has no catalog alternative
+                    if x not in self.preqtester.credits:
+                        _reason += f"\t{x} (not found in catalog)\n"
+                        continue
                     x = self.preqtester.find_course(x)
                     _reason += f"\t{x['CourseCode']} - {x['CourseTitle']} ({x['Credits']} credits)\n"
                 return False, _reason
@@ -363,7 +394,156 @@ class AdvisorTools:
 
         return True, ""
 
+    def next_semester_candidates(self, transcript: dict, needed_credits: Optional[float] = None) -> Dict[str, float]:
+        """
+        Courses `validate_courses` accepts for the next semester (in the catalog, not completed or
+        in progress, prerequisites met by the completed courses) that are still needed for the
+        student's degrees: a course of an unfinished section, or a prerequisite every way to one
+        goes through. When those add up to fewer than `needed_credits - 3` credits, e.g. a
+        student whose remaining credits are free electives, up to `FREE_ELECTIVE_CANDIDATES`
+        other eligible courses are added after them.
+
+        Args:
+            transcript: Student transcript dictionary
+            needed_credits: leaves out courses with more credits than this on their own
+
+        Returns:
+            Dict of course code -> credits (as added up by validate_courses), degree courses first,
+            prerequisites first within each group
+        """
+        completed = list(get_completed_courses(transcript))
+        skipped = set(completed) | self.inprogress_codes(transcript)
+        graph = self.preqtester.graph
+
+        needed = set()
+        for progress in self.student_context(transcript)['degree_progress'].values():
+            for section in progress.values():
+                if not section['completed']:
+                    needed.update(code for _, codes in section.get('groups', []) for code in codes)
+                    needed.update(section['not_completed'])
+
+        mask = graph.mask(needed)
+        for node in graph.nodes(mask):
+            mask |= graph.required[node]
+
+        candidates = {}
+        for code in graph.courses(mask):
+            if code in skipped or code not in self.catalog or not self.preqtester(code, completed):
+                continue
+            credits = course_credits(self.catalog.get(code)['Credits'])
+            if needed_credits is not None and credits > needed_credits:
+                continue
+            candidates[code] = credits
+
+        if needed_credits is not None and sum(candidates.values()) < needed_credits - 3:
+            self._add_free_electives(candidates, completed, skipped, needed_credits)
+        return candidates
+
+    def _add_free_electives(self, candidates: Dict[str, float], completed: list, skipped: set, needed_credits: float):
+        # eligible courses outside the degree, follow-ups of completed courses and subjects the
+        # student already takes first, then lower courses in the prerequisite chain
+        graph = self.preqtester.graph
+        done = self.preqtester.to_mask(completed)
+        followups = 0
+        for node in graph.nodes(graph.mask(completed)):
+            followups |= graph.dependents[node]
+        subjects = {code.split()[0] for code in completed}
+
+        ranked = []
+        for code in self.preqtester.prereqs:
+            if code in candidates or code in skipped or code not in self.catalog or not self.preqtester(code, done):
+                continue
+            credits = course_credits(self.catalog.get(code)['Credits'])
+            if not credits or credits > needed_credits:
+                continue
+            node = graph.index[code]
+            ranked.append((not followups >> node & 1, code.split()[0] not in subjects, graph.depth[node], code, credits))
+        ranked.sort()
+
+        for *_, code, credits in ranked[:FREE_ELECTIVE_CANDIDATES]:
+            candidates[code] = credits
+
     def transcript2context(self, transcript: dict):
+        """Student info, courses and degree progress formatted for the LLM, cached per transcript."""
+        return self.student_context(transcript)['context']
+
+    def student_context(self, transcript: dict) -> Dict[str, Any]:
+        """
+        Rendered context of a student, reused while the transcript content is unchanged.
+
+        Args:
+            transcript: Student transcript dictionary
+
+        Returns:
+            Dict with keys: context (str), degree_files (list of degree filenames) and
+            degree_progress (degree filename -> parse_degree_requirements_from_transcript output).
+            Shared between calls, do not modify.
+        """
+        key = helpers.transcript_hash(transcript)
+        student = self.context_cache.get(key)
+        if student is None:
+            student = self._build_student_context(transcript)
+            self.context_cache.set(key, student)
+        return student
+
+    def context_cache_info(self) -> Dict[str, Any]:
+        """Hit/miss counters of the student context cache."""
+        return self.context_cache.info()
+
+    def clear_context_cache(self):
+        """Drop every cached student context, e.g. after degree files were edited."""
+        self.context_cache.clear()
+
+    def passed_courses(self, transcript: dict) -> Set[str]:
+        """Codes ("CS 04222") of transfer courses and completed courses with a passing grade."""
+        completed = set()
+        if 'transfer' in transcript:
+            for course in transcript['transfer']:
+                completed.add(f"{course['subject']} {course['course_number']}")
+
+        if 'completed' in transcript:
+            for term_data in transcript['completed']:
+                for course in term_data['courses']:
+                    if helpers.is_passing_grade(course.get('grade', 'F')):
+                        completed.add(f"{course['subject']} {course['course_number']}")
+        return completed
+
+    def tool_cache_key(self, tool_name: str, arguments: Dict[str, Any], transcript: dict) -> Optional[tuple]:
+        """
+        Key for a tool result in `tool_cache`, made of only the transcript parts the tool reads,
+        so students with the same standing share results.
+
+        Args:
+            tool_name: tool called by the LLM
+            arguments: tool arguments from the LLM
+            transcript: Student transcript dictionary
+
+        Returns:
+            Hashable key, None if the tool result must not be cached
+        """
+        args = json.dumps(arguments, sort_keys=True, default=str)
+
+        if tool_name == "get_course_info":
+            # catalog lookup plus a prerequisite check against the passed courses
+            student = tuple(sorted(self.passed_courses(transcript)))
+        elif tool_name in ("get_prerequisite_chain", "get_unlocked_courses"):
+            student = (tuple(sorted(self.passed_courses(transcript))), tuple(sorted(self.inprogress_codes(transcript))))
+        elif tool_name == "search_courses":
+            # catalog only, unless filtering to courses the student is eligible for
+            student = tuple(sorted(self.passed_courses(transcript))) if arguments.get("eligible_only") else None
+        elif tool_name == "plan_degree":
+            # the plan reads the whole standing (courses, credits, degree, last term)
+            student = transcript
+        elif tool_name in ("get_degree_courses", "get_degree_description"):
+            # an explicit degree is a plain file lookup, otherwise the degree comes from the transcript
+            student = None if arguments.get("degree") else (transcript.get('program'), transcript.get('major'))
+        else:
+            # next_semester asks the LLM, every call should be a new recommendation
+            return None
+
+        return tool_name, args, helpers.transcript_hash(student) if student else None
+
+    def _build_student_context(self, transcript: dict) -> Dict[str, Any]:
         if 'transfer' not in transcript:
             transfer_courses = ""
         else:
@@ -411,10 +591,11 @@ class AdvisorTools:
         # f"\n{in_progress_courses}\n" +
         "\n\n")
 
+        degree_progress = {}
         for d in degree_filenames:
-            _degree = open(os.path.join(os.path.dirname(__file__), "vault", "degrees", d), "r").read()
-            _degree = json.loads(_degree)
+            _degree = load_degree(os.path.join(helpers.DEGREES_DIR, d))
             degree_req = parse_degree_requirements_from_transcript(_degree, transcript)
+            degree_progress[d] = degree_req
 
             context += f"[DEGREE REQUIREMENTS FOR {d.upper()}]\n"
             for head, v in degree_req.items():
@@ -428,7 +609,12 @@ class AdvisorTools:
 
                 context += "\n"
         
-        return context
+        return {
+            "context": context,
+            "degree_files": degree_filenames,
+            "degree_progress": degree_progress,
+        }
+
     def get_degree_description(self, transcript: Dict[str, Any], degree: Optional[str] = None) -> str:
         """
         Get the degree program description only.
@@ -440,173 +626,105 @@ class AdvisorTools:
         return self.get_degree_data(transcript, "description", degree)
 
 
-    def get_course_info(self, transcript: Dict[str, Any], course: str) -> str:
+    @staticmethod
+    def _infer_subject(text: str) -> Optional[str]:
+        """First subject code whose keywords appear in the text ("Calc 3" -> "MATH"), None otherwise."""
+        text = text.lower()
+        for subject, keywords in SUBJECT_KEYWORDS.items():
+            if any(keyword in text for keyword in keywords):
+                return subject
+        return None
+
+    def lookup_course(self, course: str):
         """
-        Get detailed information about a specific course including prerequisites check.
+        Course record for a course code or title as typed by the student.
+        Tries the code, then titles containing the search words, then spelling-tolerant title matching.
 
         Args:
-            transcript: Student transcript dictionary
-            course: Course code OR course title to look up (e.g., "MATH 01132", "Calculus III", "Calc 3")
+            course: Course code OR course title (e.g., "MATH 01132", "Calculus III", "Calc 3")
 
         Returns:
-            Formatted string with course details and prerequisite status
+            (course record or None, True if the title was matched with spelling correction)
         """
-        try:
-            # Load courses database
-            courses_path = "core/vault/courses.json"
-            if not os.path.exists(courses_path):
-                return f"Error: Courses database not found at {courses_path}"
-
-            with open(courses_path, 'r', encoding='utf-8') as f:
-                courses_db = json.load(f)
-
-            # First, try to find by course code (exact match)
-            course_obj = None
-            normalized_input = helpers.normalize_course_code(course)
-
-            for c in courses_db:
-                course_code_in_db = c.get('CourseCode', '')
-                normalized_db = helpers.normalize_course_code(course_code_in_db)
-                if normalized_db == normalized_input:
-                    course_obj = c
-                    break
-
-            # If not found by code, try to find by title (fuzzy search with Roman numeral support)
-            if not course_obj:
-                # Infer subject from common keywords
-                inferred_subject = None
-                search_lower = course.lower()
-                # trying to infer subject from keywords to narrow down search and improve accuracy
-                subject_keywords = {
-                    'MATH': ['calc', 'calculus', 'algebra', 'geometry', 'trigonometry', 'statistics', 'math'],
-                    'CS': ['programming', 'computer', 'software', 'algorithm', 'data structures', 'coding'],
-                    'PHYS': ['physics'],
-                    'CHEM': ['chemistry', 'chem'],
-                    'BIO': ['biology', 'bio'],
-                    'ENG': ['english', 'literature', 'writing'],
-                    'HIST': ['history'],
-                    'PSYC': ['psychology', 'psych']
-                }
+        # First, try to find by course code (exact match)
+        course_obj = self.catalog.get(course)
 
-                for subject, keywords in subject_keywords.items():
-                    if any(keyword in search_lower for keyword in keywords):
-                        inferred_subject = subject
-                        break
+        # trying to infer subject from keywords to narrow down search and improve accuracy
+        inferred_subject = self._infer_subject(course)
 
-                # Normalize the search term
-                normalized_search = helpers.normalize_course_title_for_search(course)
-                search_words = normalized_search.split()
+        # If not found by code, try to find by title (fuzzy search with Roman numeral support)
+        if not course_obj:
+            # Normalize the search term
+            normalized_search = helpers.normalize_course_title_for_search(course)
+            search_words = normalized_search.split()
 
-                matches = []
-
-                for c in courses_db:
-                    # If we inferred a subject, filter by it
-                    if inferred_subject:
-                        course_code = c.get('CourseCode', '')
-                        if not course_code.startswith(inferred_subject):
-                            continue
-
-                    course_title = c.get('CourseTitle', '')
-                    normalized_title = helpers.normalize_course_title_for_search(course_title)
-
-                    # Strategy 1: Check if all words in search appear in title
-                    all_words_match = all(word in normalized_title for word in search_words)
+            matches = []
 
-                    # Strategy 2: Check if search is substring of title
-                    substring_match = normalized_search in normalized_title
+            # only titles containing every search word can match strategy 1 or 2
+            for c in self.catalog.title_candidates(search_words):
+                # If we inferred a subject, filter by it
+                if inferred_subject:
+                    course_code = c.get('CourseCode', '')
+                    if not course_code.startswith(inferred_subject):
+                        continue
 
-                    if all_words_match or substring_match:
-                        # Calculate a match score (prefer exact matches)
-                        score = 0
-                        if normalized_search == normalized_title:
-                            score = 100  # Exact match
-                        elif substring_match:
-                            score = 50  # Substring match
-                        elif all_words_match:
-                            score = 25  # All words present
+                course_title = c.get('CourseTitle', '')
+                normalized_title = helpers.normalize_course_title_for_search(course_title)
 
-                        matches.append((c, score, 'exact'))
+                # Strategy 1: Check if all words in search appear in title
+                all_words_match = all(word in normalized_title for word in search_words)
 
-                # Sort by score (highest first)
-                matches.sort(key=lambda x: x[1], reverse=True)
+                # Strategy 2: Check if search is substring of title
+                substring_match = normalized_search in normalized_title
 
-                # Take the best match if we have any
-                if matches:
-                    course_obj = matches[0][0]
+                if all_words_match or substring_match:
+                    # Calculate a match score (prefer exact matches)
+                    score = 0
+                    if normalized_search == normalized_title:
+                        score = 100  # Exact match
+                    elif substring_match:
+                        score = 50  # Substring match
+                    elif all_words_match:
+                        score = 25  # All words present
 
-            # Strategy 3: If still not found, try spelling-tolerant fuzzy matching
-            spelling_corrected = False
-            if not course_obj:
-                # Ensure inferred_subject is defined (may not be if we found by code)
-                if 'inferred_subject' not in locals():
-                    inferred_subject = None
-                    search_lower = course.lower()
-                    subject_keywords = {
-                        'MATH': ['calc', 'calculus', 'algebra', 'geometry', 'trigonometry', 'statistics', 'math'],
-                        'CS': ['programming', 'computer', 'software', 'algorithm', 'data structures', 'coding'],
-                        'PHYS': ['physics'],
-                        'CHEM': ['chemistry', 'chem'],
-                        'BIO': ['biology', 'bio'],
-                        'ENG': ['english', 'literature', 'writing'],
-                        'HIST': ['history'],
-                        'PSYC': ['psychology', 'psych']
-                    }
-                    for subject, keywords in subject_keywords.items():
-                        if any(keyword in search_lower for keyword in keywords):
-                            inferred_subject = subject
-                            break
-
-                normalized_search = helpers.normalize_course_title_for_search(course)
-                fuzzy_matches = []
-
-                # Higher threshold for short queries to prevent false matches like "calc 4" → "clinical practice 4"
-                min_threshold = 0.8 if len(normalized_search) <= 10 else 0.7
-
-                for c in courses_db:
-                    # Apply subject filter if we inferred one
-                    if inferred_subject:
-                        course_code_check = c.get('CourseCode', '')
-                        if not course_code_check.startswith(inferred_subject):
-                            continue
+                    matches.append((c, score, 'exact'))
 
-                    course_title = c.get('CourseTitle', '')
-                    normalized_title = helpers.normalize_course_title_for_search(course_title)
+            # Sort by score (highest first)
+            matches.sort(key=lambda x: x[1], reverse=True)
 
-                    # Use SequenceMatcher to calculate similarity ratio
-                    similarity = SequenceMatcher(None, normalized_search, normalized_title).ratio()
+            # Take the best match if we have any
+            if matches:
+                course_obj = matches[0][0]
 
-                    # Also check word-level similarity for partial matches
-                    search_words = normalized_search.split()
-                    title_words = normalized_title.split()
+        # Strategy 3: If still not found, try spelling-tolerant fuzzy matching
+        spelling_corrected = False
+        if not course_obj:
+            normalized_search = helpers.normalize_course_title_for_search(course)
 
-                    # Calculate how many search words have close matches in title
-                    word_match_score = 0
-                    for search_word in search_words:
-                        best_word_similarity = max(
-                            (SequenceMatcher(None, search_word, title_word).ratio()
-                             for title_word in title_words),
-                            default=0
-                        )
-                        word_match_score += best_word_similarity
+            # Higher threshold for short queries to prevent false matches like "calc 4" → "clinical practice 4"
+            min_threshold = 0.8 if len(normalized_search) <= 10 else 0.7
 
-                    # Normalize word match score
-                    if search_words:
-                        word_match_score = word_match_score / len(search_words)
+            # best of full-title and word-level similarity, see CourseCatalog.fuzzy_title_match
+            fuzzy_match = self.catalog.fuzzy_title_match(course, min_threshold, inferred_subject)
+            if fuzzy_match:
+                course_obj = fuzzy_match[0]
+                spelling_corrected = True
 
-                    # Take the better of full-string or word-level matching
-                    final_similarity = max(similarity, word_match_score)
+        return course_obj, spelling_corrected
 
-                    # Only consider courses above the threshold
-                    if final_similarity >= min_threshold:
-                        fuzzy_matches.append((c, final_similarity))
+    def get_course_info(self, transcript: Dict[str, Any], course: str) -> str:
+        """
+        Get detailed information about a specific course including prerequisites check.
 
-                # Sort by similarity (highest first)
-                fuzzy_matches.sort(key=lambda x: x[1], reverse=True)
+        Args:
+            transcript: Student transcript dictionary
+            course: Course code OR course title to look up (e.g., "MATH 01132", "Calculus III", "Calc 3")
 
-                # Take the best fuzzy match if we have any
-                if fuzzy_matches:
-                    course_obj = fuzzy_matches[0][0]
-                    spelling_corrected = True
+        Returns:
+            Formatted string with course details and prerequisite status
+        """
+        try:
+            course_obj, spelling_corrected = self.lookup_course(course)
 
             if not course_obj:
                 return f"Course not found: {course}\nPlease try using either the course code (e.g., 'MATH 01133') or course title (e.g., 'Calculus III')"
@@ -637,19 +755,7 @@ class AdvisorTools:
 
             if prereq_data and prereq_data.get('expr'):
                 # Build set of completed courses from transcript
-                completed = set()
-                if 'transfer' in transcript:
-                    for t_course in transcript['transfer']:
-                        code = f"{t_course['subject']} {t_course['course_number']}"
-                        completed.add(code)
-
-                if 'completed' in transcript:
-                    for term_data in transcript['completed']:
-                        for t_course in term_data['courses']:
-                            code = f"{t_course['subject']} {t_course['course_number']}"
-                            # Only count if passing grade
-                            if helpers.is_passing_grade(t_course.get('grade', 'F')):
-                                completed.add(code)
+                completed = self.passed_courses(transcript)
 
                 # Evaluate prerequisites with AND/OR logic
                 all_met, prereq_details = helpers.evaluate_prerequisites(
@@ -668,6 +774,207 @@ class AdvisorTools:
         except Exception as e:
             return f"Error getting course info: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
 
+    def inprogress_codes(self, transcript: dict) -> Set[str]:
+        """Codes ("CS 04222") of the courses the student is taking this semester."""
+        return {
+            f"{course['subject']} {course['course_number']}"
+            for term_data in transcript.get('inprogress', [])
+            for course in term_data['courses']
+        }
+
+    def get_prerequisite_chain(self, transcript: Dict[str, Any], course: str) -> str:
+        """
+        Get everything that has to be taken before a course, across the whole prerequisite chain,
+        with the student's status for each course. Answers from the precomputed prerequisite graph
+        instead of one get_course_info call per link of the chain.
+
+        Args:
+            transcript: Student transcript dictionary
+            course: Course code OR course title (e.g., "CS 07340", "Artificial Intelligence")
+
+        Returns:
+            Formatted string with the required courses in the order they can be taken,
+            the alternatives, the number of semesters of prerequisites, and the fewest courses
+            the student still has to take
+        """
+        try:
+            course_obj, _ = self.lookup_course(course)
+            if not course_obj:
+                return f"Course not found: {course}\nPlease try using either the course code (e.g., 'MATH 01133') or course title (e.g., 'Calculus III')"
+
+            code = course_obj['CourseCode']
+            graph = self.preqtester.graph
+            passed = self.passed_courses(transcript)
+            inprogress = self.inprogress_codes(transcript)
+
+            def describe(crse):
+                record = self.catalog.get(crse)
+                title = record['CourseTitle'] if record else "not found in catalog"
+                status = "completed" if crse in passed else "in progress" if crse in inprogress else "still needed"
+                return f"- {crse} - {title} ({status})"
+
+            output_lines = ["[ PREREQUISITE CHAIN ]", ""]
+            output_lines.append(f"Course: {code} - {course_obj.get('CourseTitle', 'N/A')}")
+
+            required = graph.required_before(code)
+            alternatives = graph.required_before(code, all_alternatives=True) & ~required
+            if not required and not alternatives:
+                output_lines.append("PREREQUISITES: None")
+                return "\n".join(output_lines)
+
+            output_lines.append(f"Semesters of prerequisites before this course (at least): {graph.chain_depth(code)}")
+            output_lines.append("")
+
+            if required:
+                output_lines.append("Required before this course, in the order they can be taken:")
+                output_lines.extend(describe(crse) for crse in graph.courses(required))
+                output_lines.append("")
+
+            if alternatives:
+                output_lines.append("Courses that are one of several options (only some are needed):")
+                output_lines.extend(describe(crse) for crse in graph.courses(alternatives))
+                output_lines.append("")
+
+            # cheapest set of courses from the student's transcript, prerequisites before the courses needing them
+            path = self.preqtester.courses_to_satisfy(code, passed | inprogress, transitive=True)
+            if self.preqtester(code, passed | inprogress):
+                output_lines.append("The student has (or will have, after the in-progress courses) all prerequisites.")
+            elif path:
+                output_lines.append("Fewest courses the student still has to take, in order:")
+                output_lines.extend(describe(crse) for crse in path)
+            else:
+                output_lines.append("The prerequisites can not be met with catalog courses.")
+
+            return "\n".join(output_lines)
+
+        except Exception as e:
+            return f"Error getting prerequisite chain: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
+
+    def get_unlocked_courses(self, transcript: Dict[str, Any], course: str, max_results: int = 15) -> str:
+        """
+        Get the courses that open up once the student completes a course. Only the courses whose
+        prerequisites mention it are checked again (see PrerequisiteGraph.unlocks).
+
+        Args:
+            transcript: Student transcript dictionary
+            course: Course code OR course title (e.g., "CS 04222", "Data Structures")
+            max_results: Maximum number of courses listed that still need other prerequisites
+
+        Returns:
+            Formatted string with the courses that become available, and the courses it counts
+            toward that still need other prerequisites (with the fewest courses still missing)
+        """
+        try:
+            course_obj, _ = self.lookup_course(course)
+            if not course_obj:
+                return f"Course not found: {course}\nPlease try using either the course code (e.g., 'MATH 01133') or course title (e.g., 'Calculus III')"
+
+            code = course_obj['CourseCode']
+            graph = self.preqtester.graph
+
+            # in-progress courses count as done, the question is about what comes next
+            taken = (self.passed_courses(transcript) | self.inprogress_codes(transcript)) - {code}
+            unlocked, blocked = graph.unlocks(code, taken)
+
+            def describe(crse):
+                record = self.catalog.get(crse)
+                if not record:
+                    return f"- {crse} - not found in catalog"
+                return f"- {crse} - {record['CourseTitle']} ({record.get('Credits') or 'N/A'} credits)"
+
+            output_lines = ["[ COURSES UNLOCKED ]", ""]
+            output_lines.append(f"After completing: {code} - {course_obj.get('CourseTitle', 'N/A')}")
+            if code in self.passed_courses(transcript):
+                output_lines.append("(The student has already completed this course, these are the courses it made available.)")
+            output_lines.append("")
+
+            if unlocked:
+                output_lines.append(f"Courses the student can take next ({len(unlocked)}):")
+                output_lines.extend(describe(crse) for crse in unlocked)
+            else:
+                output_lines.append("No course becomes available from this course alone.")
+            output_lines.append("")
+
+            if blocked:
+                output_lines.append(f"Courses it counts toward that still need other prerequisites ({len(blocked)}):")
+                for crse in blocked[:max_results]:
+                    missing = self.preqtester.courses_to_satisfy(crse, taken | {code})
+                    output_lines.append(describe(crse) + (f" - still needs: {', '.join(missing)}" if missing else ""))
+                if len(blocked) > max_results:
+                    output_lines.append(f"... and {len(blocked) - max_results} more")
+                output_lines.append("")
+
+            later = graph.descendants[graph.node(code)]
+            output_lines.append(f"Courses anywhere further down its prerequisite chain: {bin(later).count('1')}")
+
+            return "\n".join(output_lines)
+
+        except Exception as e:
+            return f"Error getting unlocked courses: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
+
+    def plan_semesters(self, transcript: Dict[str, Any], max_credits: float = 15) -> DegreePlan:
+        """
+        Semester-by-semester plan to graduation for the student's degrees (see core.planner).
+
+        Args:
+            transcript: Student transcript dictionary
+            max_credits: credit cap of each term
+
+        Returns:
+            DegreePlan, every term only needs courses of earlier terms and stays under the cap
+        """
+        student = self.student_context(transcript)
+        total_credits = max([load_degree(os.path.join(helpers.DEGREES_DIR, d)).total_credits or 0
+                             for d in student['degree_files']] or [0])
+        return self.planner.plan(transcript, student['degree_progress'], max_credits,
+                                 total_credits=total_credits or 120)
+
+    def get_degree_plan(self, transcript: Dict[str, Any], max_credits: float = 15) -> str:
+        """
+        Get a semester-by-semester plan of the remaining degree courses.
+
+        Args:
+            transcript: Student transcript dictionary
+            max_credits: credit cap of each term
+
+        Returns:
+            Formatted string with the courses of each term, the expected graduation term and
+            the requirements that could not be planned
+        """
+        try:
+            plan = self.plan_semesters(transcript, max_credits)
+
+            def describe(crse):
+                record = self.catalog.get(crse)
+                if not record:
+                    return f"- {crse} - not found in catalog"
+                return f"- {crse} - {record['CourseTitle']} ({record.get('Credits') or 'N/A'} credits)"
+
+            output_lines = ["[ DEGREE PLAN ]", ""]
+            output_lines.append(f"Credits per semester: at most {max_credits:g}")
+            output_lines.append(f"Credits left for the degree: {plan.credits_left:g}")
+            if plan.graduation_term:
+                output_lines.append(f"Expected graduation: {plan.graduation_term} ({len(plan.terms)} semesters)")
+            else:
+                output_lines.append("Expected graduation: unknown, some requirements could not be planned (see below)")
+            output_lines.append("")
+
+            for term in plan.terms:
+                output_lines.append(f"{term.term} ({term.total_credits:g} credits):")
+                output_lines.extend(describe(crse) for crse in term.courses)
+                if term.free_credits:
+                    output_lines.append(f"- Free electives ({term.free_credits:g} credits)")
+                output_lines.append("")
+
+            if plan.unplanned:
+                output_lines.append("Could not be planned:")
+                output_lines.extend(f"- {crse}: {reason}" for crse, reason in plan.unplanned.items())
+
+            return "\n".join(output_lines).rstrip()
+
+        except Exception as e:
+            return f"Error planning degree: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
+
     def search_courses(self, transcript: Dict[str, Any], subject: Optional[str] = None,
                       eligible_only: bool = False, credits: Optional[str] = None,
                       keyword: Optional[str] = None, max_results: int = 20) -> str:
@@ -686,28 +993,24 @@ class AdvisorTools:
             Formatted string with list of matching courses
         """
         try:
-            # Load courses database
-            courses_path = "core/vault/courses.json"
-            if not os.path.exists(courses_path):
-                return f"Error: Courses database not found at {courses_path}"
+            # Start from the smallest catalog bucket that the filters allow (all in file order)
+            courses_db = self.catalog.courses
+            if subject:
+                courses_db = self.catalog.subject(subject)
+            if credits and len(self.catalog.with_credits(credits)) < len(courses_db):
+                courses_db = self.catalog.with_credits(credits)
 
-            with open(courses_path, 'r', encoding='utf-8') as f:
-                courses_db = json.load(f)
+            # Keyword searches are ranked by relevance (BM25) instead of file order.
+            # Keywords made only of stop words ("course") fall back to a substring filter
+            ranked = bool(keyword and tokenize(keyword))
+            if ranked:
+                courses_db = (c for c, _ in self.catalog.search(keyword, subject, credits))
 
             # Build set of completed courses if checking eligibility
-            completed = set()
-            if eligible_only:
-                if 'transfer' in transcript:
-                    for course in transcript['transfer']:
-                        code = f"{course['subject']} {course['course_number']}"
-                        completed.add(code)
-
-                if 'completed' in transcript:
-                    for term_data in transcript['completed']:
-                        for course in term_data['courses']:
-                            code = f"{course['subject']} {course['course_number']}"
-                            if helpers.is_passing_grade(course.get('grade', 'F')):
-                                completed.add(code)
+            completed = self.passed_courses(transcript) if eligible_only else set()
+
+            # Prerequisite expressions from courses.db, loaded once for the whole search
+            prereq_table = helpers.load_course_prerequisites()
 
             # Filter courses
             matches = []
@@ -718,7 +1021,7 @@ class AdvisorTools:
                 course_desc = course.get('Description', '')
 
                 # Get prerequisite expression from courses.db
-                prereq_data = helpers.get_course_prerequisites(course_code)
+                prereq_data = prereq_table.get(course_code)
                 prereq_expr = prereq_data.get('expr', '') if prereq_data else ''
 
                 # Apply subject filter
@@ -734,7 +1037,7 @@ class AdvisorTools:
                         continue
 
                 # Apply keyword filter
-                if keyword:
+                if keyword and not ranked:
                     keyword_lower = keyword.lower()
                     if (keyword_lower not in course_title.lower() and
                         keyword_lower not in course_desc.lower()):
@@ -810,7 +1113,10 @@ class AdvisorTools:
             search_data['courses'] = courses_list
 
             if len(matches) >= max_results:
-                search_data['note'] = f"Showing first {max_results} results"
+                if ranked:
+                    search_data['note'] = f"Showing top {max_results} results by relevance"
+                else:
+                    search_data['note'] = f"Showing first {max_results} results"
 
             # Convert to TOON format
             output = "[ COURSE SEARCH ]\n"
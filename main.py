@@ -1,4 +1,6 @@
 from core.llm import LLMAgent
+from core.helpers import invalidate_course_prerequisites, transcript_hash
+from core.cache import TTLCache
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.responses import StreamingResponse, HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
@@ -8,9 +10,16 @@ import uvicorn
 import json
 import sqlite3
 from pathlib import Path
+from contextlib import asynccontextmanager
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # close the keep-alive connections to the LLM server
+    await agent.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Paths
 BASE_DIR = Path(__file__).parent
@@ -23,6 +32,8 @@ templates = Jinja2Templates(directory=str(TEMPLATES_PATH))
 class ChatRequest(BaseModel):
     messages: List[Dict[str, str]]
     transcript: Optional[Dict[str, Any]] = None
+    # transcript_hash of a transcript sent earlier, used when `transcript` is left out
+    transcript_hash: Optional[str] = None
     json_schema: Optional[Dict[str, Any]] = None
 
 class GenerateRequest(BaseModel):
@@ -33,28 +44,62 @@ class GenerateRequest(BaseModel):
 # Wanted a way to turn off thinking for final production use 
 agent = LLMAgent(model_name="ministral-3:8b",
                  model_url="http://localhost:11434/api/chat",
-                 display_thinking=True)
+                 display_thinking=True,
+                 connect_timeout=10.0,
+                 read_timeout=300.0)
+
+# transcripts sent with a chat, so the following chats of a student only send the hash
+TRANSCRIPT_CACHE_SIZE = 1024
+TRANSCRIPT_CACHE_TTL = 6 * 60 * 60
+transcripts = TTLCache(TRANSCRIPT_CACHE_SIZE, ttl=TRANSCRIPT_CACHE_TTL)
 
 @app.get("/")
 def read_root():
     return {"status": "agent is running!"}
 
-def encode_stream(generator):
+async def encode_stream(generator):
     """Helper to encode string tokens to bytes for StreamingResponse"""
-    for token in generator:
+    async for token in generator:
         if token:
             yield token.encode('utf-8', errors='replace')
 
+@app.get("/metrics")
+def metrics():
+    """Hit rates of the per-student context cache and the tool result cache"""
+    return {"context_cache": agent.tools.context_cache_info(),
+            "tool_cache": agent.tools.tool_cache.info(),
+            "transcript_cache": transcripts.info()}
+
+# tokens are flushed as the LLM produces them, keep proxies from buffering the response
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def generate_tokens(query: str, schema: Optional[Dict[str, Any]] = None):
+    """Content tokens of a single prompt, streamed from the LLM"""
+    async for chunk in agent.stream_response([{"role": "user", "content": query}], schema=schema):
+        yield (chunk.get("message") or {}).get("content", "")
+
+# chats run on the event loop instead of holding a worker thread for the whole tool loop
 @app.post("/chat")
-def chat(req: ChatRequest):
+async def chat(req: ChatRequest):
+    transcript = req.transcript
+    if transcript is not None:
+        transcripts.set(transcript_hash(transcript), transcript)
+    elif req.transcript_hash:
+        transcript = transcripts.get(req.transcript_hash)
+        if transcript is None:
+            # the client sends the request again with the full transcript
+            raise HTTPException(status_code=404, detail="Transcript not found, send it in full")
+
     return StreamingResponse(encode_stream(agent(req.messages,
-                                                req.transcript)),
-                                                media_type="text/plain; charset=utf-8")
+                                                transcript)),
+                                                media_type="text/plain; charset=utf-8",
+                                                headers=STREAM_HEADERS)
 
 @app.post("/generate")
-def generate(req: GenerateRequest):
-    return StreamingResponse(encode_stream(agent.generate_response(req.query)), 
-                                                     media_type="text/plain; charset=utf-8")
+async def generate(req: GenerateRequest):
+    return StreamingResponse(encode_stream(generate_tokens(req.query, req.json_schema)), 
+                                                     media_type="text/plain; charset=utf-8",
+                                                     headers=STREAM_HEADERS)
 
 
 # Helper function to fetch the courses from courses.db
@@ -115,6 +160,11 @@ def update_course_in_db(course_code: str, expr: str, valid: bool, not_found_list
     conn.commit()
     conn.close()
 
+    # the agent tools keep the prerequisite table in memory, reload it on the next lookup
+    invalidate_course_prerequisites(DB_PATH)
+    # cached tool results may show the old prerequisites
+    agent.tools.tool_cache.clear()
+
 # Visit this URL to see the courses in courses.db
 @app.get("/prerequisites", response_class=HTMLResponse)
 def prerequisites(request: Request):
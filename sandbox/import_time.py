@@ -0,0 +1,59 @@
+"""
+Import-time check for the agent server.
+
+Imports core.tools, core.llm and main in a fresh interpreter and fails when one of them
+takes longer than IMPORT_BUDGET seconds or loads a heavy package (torch, the embedding
+stack, PDF or scraping libraries) that only some code paths need.
+
+Run from the repository root:
+    python sandbox/import_time.py
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# seconds, importing main also builds the agent (catalog, prerequisite cache)
+IMPORT_BUDGET = 1.0
+
+# packages that must only be imported on the code paths that use them
+HEAVY_MODULES = [
+    "torch", "transformers", "sentence_transformers", "chromadb",
+    "fitz", "pymupdf", "bs4", "pandas", "tqdm",
+]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    # the agent prints while starting up, the measurement is the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    failed = False
+    for module in ["core.tools", "core.llm", "main"]:
+        result = measure(module)
+        status = "ok"
+        if result["loaded"]:
+            status = f"FAIL heavy modules loaded: {', '.join(result['loaded'])}"
+            failed = True
+        elif result["elapsed"] > IMPORT_BUDGET:
+            status = f"FAIL over {IMPORT_BUDGET:.1f}s budget"
+            failed = True
+        print(f"{module:<12} {result['elapsed']*1000:8.1f} ms  {status}")
+
+    sys.exit(1 if failed else 0)
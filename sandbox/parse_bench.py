@@ -0,0 +1,166 @@
+"""
+Transcript parser benchmark.
+
+Times `helpers.parse_transcript_text` against the previous extract_info parser, which
+rebuilt its patterns and re-split the text on every call, and checks that both return
+the same student information.
+
+Run from the repository root, on transcript PDFs or on generated transcripts:
+    python sandbox/parse_bench.py path/to/transcripts/
+    python sandbox/parse_bench.py --generate 500
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.helpers import parse_transcript, parse_transcript_text, pdf_to_text
+
+
+def legacy_parse(transcript):
+    # extract_info before the patterns were compiled at module level, kept for comparison
+    sections = re.split(r'(?m)^(?=[A-Z][A-Z ]+$)', transcript)
+    student_info = parse_transcript(sections[1])
+
+    term_pattern = r"(?i)((?:Fall|Spring|Summer|Winter) (?:[0-9]{4}))\n"
+    blocks = re.split(term_pattern, transcript)
+
+    overalls = re.search(r"Overall:?\s*(.*?)(?=[A-Za-z]|$)", transcript, re.DOTALL)
+    assert overalls, "Overall section not found"
+    overalls = [float(x) for x in overalls.group(1).split("\n")[:6]]
+    for key, value in zip(["attempted_credits", "passed_credits", "earned_credits",
+                           "gpa_credits", "quality_points", "gpa"], overalls):
+        student_info[key] = value
+
+    subj_ptrn, crse_ptrn = r"[A-Z]{2,4}", r"\d{5}"
+    cmps_ptrn, lvl_ptrn = r"Main|Online|Off-campus", r"UG|GR|[A-Z]{2}"
+    ttl_ptrn, grde_ptrn = r"[A-Z0-9\s\-/&:(),]+?", r"[A-Z]{1,2}[+-]?|W|TR"
+    crd_ptrn = qual_ptrn = r"\d+\.\d+"
+    transfer_pattern = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)" % (subj_ptrn, crse_ptrn, ttl_ptrn, grde_ptrn, crd_ptrn))
+    course_pattern = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)\s+(%s)" %
+                                (subj_ptrn, crse_ptrn, cmps_ptrn, lvl_ptrn, ttl_ptrn, grde_ptrn, crd_ptrn, qual_ptrn))
+    inprog_pattern = re.compile(r"(%s)\s+(%s)\s+(%s)\s+(%s)\s+(.+?)\s+(%s)(?=\s*(?:[A-Z]{2,4}\s+\d{5}|\s*$|\s*\w+\s*Transcript))" %
+                                (subj_ptrn, crse_ptrn, cmps_ptrn, lvl_ptrn, crd_ptrn), re.DOTALL)
+
+    cur_term = None
+    for block in blocks:
+        match = re.match(r"(?i)(Fall|Spring|Summer|Winter) (\d{4})", block)
+        if match and len(block) < 20:
+            cur_term = match.group(0)
+            continue
+
+        if re.search(r"(?i)(?:TRANSFER CREDIT ACCEPTED BY INSTITUTION)", block):
+            student_info.setdefault("transfer", [])
+            for match in re.finditer(transfer_pattern, block):
+                student_info["transfer"].append({
+                    "subject": match.group(1), "course_number": match.group(2),
+                    "title": re.sub(r'\s+', ' ', match.group(3)).strip(),
+                    "grade": match.group(4), "credits": match.group(5)
+                })
+            continue
+
+        if "Credit Hours" in block and "Subject" in block and "Course" in block:
+            inprog_matches = list(re.finditer(inprog_pattern, block))
+            if inprog_matches:
+                if "inprogress" not in student_info:
+                    student_info["inprogress"] = [{"term": cur_term, "courses": []}]
+                elif student_info["inprogress"][-1]["term"] != cur_term:
+                    student_info["inprogress"].append({"term": cur_term, "courses": []})
+                for match in inprog_matches:
+                    student_info["inprogress"][-1]["courses"].append({
+                        "subject": match.group(1), "course_number": match.group(2),
+                        "campus": match.group(3), "level": match.group(4),
+                        "title": re.sub(r'\s+', ' ', match.group(5)).strip(),
+                        "credits": match.group(6)
+                    })
+                continue
+
+        for match in re.finditer(course_pattern, block):
+            if "completed" not in student_info:
+                student_info["completed"] = [{"term": cur_term, "courses": []}]
+            elif student_info["completed"][-1]["term"] != cur_term:
+                student_info["completed"].append({"term": cur_term, "courses": []})
+            student_info["completed"][-1]["courses"].append({
+                "subject": match.group(1), "course_number": match.group(2),
+                "campus": match.group(3), "level": match.group(4),
+                "title": re.sub(r'\s+', ' ', match.group(5)).strip(),
+                "grade": match.group(6), "credits": match.group(7), "quality_points": match.group(8)
+            })
+
+    return student_info
+
+
+COURSES = [
+    ("CS", "04103", "COMPUTER SCIENCE AND\nPROGRAMMING"), ("MATH", "01131", "CALCULUS II"),
+    ("COMP", "01111", "COLLEGE COMP I"), ("HIST", "02150", "US HISTORY: 1865-PRESENT"),
+    ("PSY", "01107", "ESSENTIALS OF PSYCHOLOGY"), ("CS", "07340", "ARTIFICIAL INTELLIGENCE"),
+]
+
+
+def generate_transcript(rng: random.Random) -> str:
+    """Text laid out like pdf_to_text output of a transcript, with a random course history."""
+    lines = ["Unofficial Transcript", "STUDENT INFORMATION", "Name", "Jane Doe", "Birth Date", "01/02",
+             "Program", "Bachelor of Science, Computing", "Major and Department", "Computer Science, Computer Science",
+             "TRANSFER CREDIT ACCEPTED BY INSTITUTION", "Summer 2021", "TRANSFER CREDIT ACCEPTED BY INSTITUTION"]
+    for subject, number, title in rng.sample(COURSES, 2):
+        lines.append(f"{subject} {number} {title} TR 3.000")
+    lines.append("INSTITUTION CREDIT")
+
+    for term in range(rng.randint(4, 12)):
+        lines.append(f"{['Fall', 'Spring', 'Summer'][term % 3]} {2021 + term // 3}")
+        for subject, number, title in rng.sample(COURSES, rng.randint(2, 5)):
+            grade = rng.choice(["A", "B+", "C-", "F", "W"])
+            lines.append(f"{subject} {number} Main UG {title} {grade} 3.000 9.000")
+        lines += ["Term Totals", "Current Term:", "9.000"]
+
+    lines += ["Fall 2026", "Subject Course Campus Level Title Credit Hours"]
+    for subject, number, title in rng.sample(COURSES, 3):
+        lines.append(f"{subject} {number} Main UG {title} 3.000")
+    lines += ["TRANSCRIPT TOTALS", "Overall:", "40.000", "40.000", "40.000", "36.000", "120.000", "3.330",
+              "Unofficial Transcript"]
+    return "\n".join(lines) + "\n"
+
+
+def bench(parse, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            parse(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="transcript PDFs or directories of them")
+    parser.add_argument("--generate", type=int, default=200, help="generated transcripts when no PDF is given")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pdfs = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            pdfs += sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".pdf"))
+        else:
+            pdfs.append(path)
+
+    # PDF text extraction is the same for both parsers, only the parsing is timed
+    if pdfs:
+        texts = [pdf_to_text(pdf) for pdf in pdfs]
+    else:
+        rng = random.Random(0)
+        texts = [generate_transcript(rng) for _ in range(args.generate)]
+
+    for text in texts:
+        assert parse_transcript_text(text) == legacy_parse(text), "parsers disagree"
+
+    legacy = bench(legacy_parse, texts, args.repeat)
+    current = bench(parse_transcript_text, texts, args.repeat)
+    print(f"{len(texts)} transcripts, identical output")
+    print(f"legacy  {legacy / len(texts) * 1000:8.3f} ms/transcript")
+    print(f"current {current / len(texts) * 1000:8.3f} ms/transcript  ({legacy / current:.2f}x)")
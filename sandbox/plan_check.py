@@ -0,0 +1,131 @@
+"""
+Semester planner check.
+
+Plans every degree file twice, for a new student and for a student who completed the
+first terms of that plan, and fails when a term has a course whose prerequisites the
+transcript and the earlier terms do not meet, or goes over the credit cap. Also checks
+that `LLMAgent.next_semester` returns the first term of a near-graduation plan padded
+with free electives instead of rejecting it (no LLM server is needed for that path).
+
+Run from the repository root:
+    python sandbox/plan_check.py
+    python sandbox/plan_check.py --max-credits 12 --done-terms 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from core.llm import LLMAgent
+from core.degrees import load_degree
+from core.helpers import DEGREES_DIR, parse_degree_requirements_from_transcript
+
+
+def new_student(**fields) -> dict:
+    transcript = {"name": "Jane Doe", "program": "Bachelor of Science", "major": "Computer Science",
+                  "concentration": None, "earned_credits": 0, "gpa": 3.5,
+                  "completed": [], "inprogress": []}
+    transcript.update(fields)
+    return transcript
+
+
+def completed_terms(tools, terms, first_year: int = 2015) -> list:
+    """Planned terms as passed transcript terms, named from Fall `first_year` on."""
+    out = []
+    for i, planned_term in enumerate(terms):
+        season = "Fall" if i % 2 == 0 else "Spring"
+        courses = []
+        for code in planned_term.courses:
+            subject, number = code.split()
+            credits = tools.planner.credits(code)
+            courses.append({"subject": subject, "course_number": number,
+                            "title": tools.catalog.get(code)['CourseTitle'],
+                            "grade": "A", "credits": credits, "quality_points": credits * 4})
+        out.append({"term": f"{season} {first_year + (i + 1) // 2}", "courses": courses})
+    return out
+
+
+def check_plan(tools, plan, transcript, max_credits: float) -> list:
+    """Problems of a plan, empty when every term is valid."""
+    problems = []
+    done = tools.passed_courses(transcript) | tools.inprogress_codes(transcript)
+    for planned_term in plan.terms:
+        if planned_term.total_credits > max_credits:
+            problems.append(f"{planned_term.term}: {planned_term.total_credits:g} credits over the {max_credits:g} cap")
+        for code in planned_term.courses:
+            if code in done:
+                problems.append(f"{planned_term.term}: {code} planned twice or already taken")
+            elif not tools.preqtester(code, done):
+                problems.append(f"{planned_term.term}: {code} prerequisites not met by earlier terms")
+        # courses of the same term do not count for each other
+        done.update(planned_term.courses)
+    return problems
+
+
+def plan_degree(tools, filename, transcript, max_credits):
+    degree = load_degree(os.path.join(DEGREES_DIR, filename))
+    progress = {filename: parse_degree_requirements_from_transcript(degree, transcript)}
+    return tools.planner.plan(transcript, progress, max_credits, total_credits=degree.total_credits or 120)
+
+
+def check_free_electives(agent, needed_credits: float) -> str:
+    """
+    Near-graduation computer science student whose only missing degree course is STAT 02290,
+    the planned term is that course plus free elective credits.
+    """
+    tools = agent.tools
+    plan = tools.plan_semesters(new_student(), needed_credits)
+    terms = [term for term in plan.terms if term.courses]
+    for term in terms:
+        term.courses = [code for code in term.courses if code != "STAT 02290"]
+    transcript = new_student(completed=completed_terms(tools, terms), earned_credits=85)
+
+    term = tools.plan_semesters(transcript, needed_credits).terms[0]
+    assert term.courses == ["STAT 02290"] and term.free_credits, f"unexpected first term {term.courses}"
+    recommendation = agent.next_semester(transcript, needed_credits, max_loop=1)
+    assert isinstance(recommendation, dict) and recommendation.get("plan") is not None, \
+        f"planned term rejected: {recommendation}"
+    return f"{recommendation['courses']} + {recommendation['free_credits']:g} free credits"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-credits", type=float, default=15)
+    parser.add_argument("--done-terms", type=int, default=2, help="planned terms completed by the second student")
+    args = parser.parse_args()
+
+    # nothing listens on the discard port, the planner path never calls the LLM
+    agent = LLMAgent(model_url="http://127.0.0.1:9/api/chat")
+    tools = agent.tools
+    filenames = sorted(f for f in os.listdir(DEGREES_DIR) if f.endswith(".json"))
+
+    failed, timings = 0, []
+    for filename in filenames:
+        transcript = new_student()
+        start = time.perf_counter()
+        plan = plan_degree(tools, filename, transcript, args.max_credits)
+        timings.append(time.perf_counter() - start)
+        problems = check_plan(tools, plan, transcript, args.max_credits)
+
+        # the same degree for a student who took the first planned terms
+        done = completed_terms(tools, [term for term in plan.terms[:args.done_terms] if term.courses])
+        transcript = new_student(completed=done, earned_credits=sum(c["credits"] for t in done for c in t["courses"]))
+        start = time.perf_counter()
+        later = plan_degree(tools, filename, transcript, args.max_credits)
+        timings.append(time.perf_counter() - start)
+        problems += check_plan(tools, later, transcript, args.max_credits)
+
+        if problems:
+            failed += 1
+            print(f"FAIL {filename}")
+            for problem in problems:
+                print(f"  {problem}")
+
+    print(f"{len(timings)} plans of {len(filenames)} degree files, {failed} with invalid terms")
+    print(f"median {statistics.median(timings) * 1000:.1f} ms/plan, slowest {max(timings) * 1000:.1f} ms (includes the degree audit)")
+    print(f"free electives: {check_free_electives(agent, int(args.max_credits))}")
+    sys.exit(1 if failed else 0)
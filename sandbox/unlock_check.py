@@ -0,0 +1,88 @@
+"""
+Reverse prerequisite index check.
+
+Compares `PrerequisiteGraph.unlocks`, which only re-evaluates the expressions that mention
+the completed course, with a full re-evaluation of every course in the catalog on random
+(course, taken) pairs, and times both.
+
+Run from the repository root:
+    python sandbox/unlock_check.py
+    python sandbox/unlock_check.py --pairs 5000 --seed 1
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from core.preqtester import PreqTester
+
+COURSES_PATH = os.path.join(ROOT, "core", "vault", "courses.json")
+
+
+def mentions(expr, bit: int) -> bool:
+    # True if the course bit appears anywhere in a compiled (op, mask, children) expression
+    _, mask, children = expr
+    return bool(mask & bit) or any(mentions(child, bit) for child in children)
+
+
+def full_unlocks(tester, course: str, taken: set):
+    """(unlocked, blocked) as `unlocks` reports them, found by evaluating every course twice."""
+    before = tester.to_mask(taken)
+    bit = tester.course_bits.get(course, 0)
+    after = before | bit
+
+    unlocked, blocked = set(), set()
+    for code, parsed in tester.prereqs.items():
+        if code == course or code in taken or not parsed or not parsed['valid']:
+            continue
+        expr = parsed['compiled']
+        if not mentions(expr, bit) or tester._evaluate(expr, before):
+            continue
+        (unlocked if tester._evaluate(expr, after) else blocked).add(code)
+    return unlocked, blocked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=1000, help="random (course, taken) pairs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tester = PreqTester(COURSES_PATH)
+    graph = tester.graph
+    rng = random.Random(args.seed)
+
+    # only courses that appear in a prerequisite can unlock anything
+    prerequisites = sorted(tester.course_bits)
+    pairs = []
+    for _ in range(args.pairs):
+        taken = set(rng.sample(prerequisites, rng.randint(0, 30)))
+        course = rng.choice(prerequisites)
+        taken.discard(course)
+        pairs.append((course, taken))
+
+    mismatches = 0
+    indexed = full = 0.0
+    for course, taken in pairs:
+        start = time.perf_counter()
+        unlocked, blocked = graph.unlocks(course, taken)
+        indexed += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = full_unlocks(tester, course, taken)
+        full += time.perf_counter() - start
+
+        if (set(unlocked), set(blocked)) != expected:
+            mismatches += 1
+            print(f"MISMATCH {course} taken={sorted(taken)}")
+            print(f"  unlocks: {sorted(unlocked)} / {sorted(blocked)}")
+            print(f"  full:    {sorted(expected[0])} / {sorted(expected[1])}")
+
+    print(f"{len(pairs)} pairs, {mismatches} mismatches")
+    print(f"unlocks {indexed / len(pairs) * 1000:8.3f} ms/query")
+    print(f"full    {full / len(pairs) * 1000:8.3f} ms/query  ({full / indexed:.1f}x)")
+    sys.exit(1 if mismatches else 0)